@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+测量 首帧显示 和 首次转换完成 距进程创建的时间，可同时比较脚本和打包后的程序:
+    python bench_startup.py --runs 5
+    python bench_startup.py --exe onefile=dist/SrtToAssConverter.exe \\
+        --exe onedir=dist-onedir/SrtToAssConverter/SrtToAssConverter.exe --no-script
+结果以 JSON 写入 --output 文件；给出 --budget-window-ms / --budget-conversion-ms 时，
+任一目标的中位数超出预算即返回非零退出码，可作为 CI 的回归检查。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+DEFAULT_SCRIPT = 'toAss_standard_qt.py'
+DEFAULT_OUTPUT = 'bench_output.txt'
+SAMPLE_CUES = 500
+
+
+def write_sample_srt(path, cues=SAMPLE_CUES):
+    """生成用于首次转换测试的示例字幕"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(cues):
+            start = i * 2000
+            end = start + 1500
+            f.write(f"{i + 1}\n{format_srt_time(start)} --> {format_srt_time(end)}\n"
+                    f"第 {i + 1} 句測試字幕\nLine {i + 1}\n\n")
+
+
+def format_srt_time(ms):
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+def run_once(command, sample, offscreen, timeout):
+    """启动一次程序，返回 (首帧毫秒, 首次转换毫秒)"""
+    fd, result_file = tempfile.mkstemp(prefix='srt2ass_bench_', suffix='.json')
+    os.close(fd)
+    os.remove(result_file)
+    env = dict(os.environ, SRT2ASS_BENCH_OUTPUT=result_file)
+    if sample:
+        env['SRT2ASS_BENCH_CONVERT'] = sample
+    if offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+    started = time.time()
+    try:
+        subprocess.run(command, env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(result_file, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    finally:
+        if os.path.exists(result_file):
+            os.remove(result_file)
+
+    window_ms = (result['first_window'] - started) * 1000
+    conversion_ms = None
+    if 'first_conversion' in result:
+        conversion_ms = (result['first_conversion'] - started) * 1000
+    return window_ms, conversion_ms
+
+
+def summarize(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {
+        'median': round(statistics.median(values), 1),
+        'min': round(min(values), 1),
+        'max': round(max(values), 1),
+    }
+
+
+def bench_target(name, command, runs, sample, offscreen, timeout):
+    """多次启动同一目标并汇总"""
+    windows, conversions = [], []
+    for i in range(runs):
+        try:
+            window_ms, conversion_ms = run_once(command, sample, offscreen, timeout)
+        except (OSError, ValueError, KeyError, subprocess.TimeoutExpired) as e:
+            print(f"{name} 第 {i + 1} 次运行失败: {e}")
+            continue
+        windows.append(window_ms)
+        conversions.append(conversion_ms)
+        conversion_text = f", 首次转换 {conversion_ms:.0f} ms" if conversion_ms is not None else ''
+        print(f"{name} #{i + 1}: 首帧 {window_ms:.0f} ms{conversion_text}")
+    return {
+        'command': command,
+        'runs': len(windows),
+        'first_window_ms': summarize(windows),
+        'first_conversion_ms': summarize(conversions),
+    }
+
+
+def check_budget(results, budget_window_ms, budget_conversion_ms):
+    """返回超出预算的说明列表"""
+    failures = []
+    for name, result in results.items():
+        if not result['runs']:
+            failures.append(f"{name}: 没有成功的运行")
+            continue
+        for key, budget in (('first_window_ms', budget_window_ms),
+                            ('first_conversion_ms', budget_conversion_ms)):
+            summary = result[key]
+            if budget and summary and summary['median'] > budget:
+                failures.append(f"{name}: {key} 中位数 {summary['median']} ms 超出预算 {budget:.0f} ms")
+    return failures
+
+
+def parse_target(value):
+    """解析 --exe 参数，格式为 名称=路径 或 路径"""
+    name, sep, path = value.partition('=')
+    if not sep:
+        path = value
+        name = os.path.splitext(os.path.basename(value))[0]
+    return name, path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='测量首帧显示和首次转换的启动耗时')
+    parser.add_argument('--exe', action='append', default=[], metavar='NAME=PATH',
+                        help='打包后的程序，可重复（如 onefile 和 onedir 各一个）')
+    parser.add_argument('--script', default=DEFAULT_SCRIPT, help='用当前解释器运行的界面脚本')
+    parser.add_argument('--no-script', action='store_true', help='不测量脚本版本')
+    parser.add_argument('--runs', type=int, default=5, help='每个目标的启动次数')
+    parser.add_argument('--sample', help='用于首次转换的字幕，默认生成示例SRT')
+    parser.add_argument('--no-conversion', action='store_true', help='只测首帧，不做转换')
+    parser.add_argument('--offscreen', action='store_true', help='使用 Qt offscreen 平台（无显示器的 CI）')
+    parser.add_argument('--timeout', type=float, default=120, help='单次运行的超时秒数')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='结果 JSON 文件')
+    parser.add_argument('--budget-window-ms', type=float, help='首帧中位数预算')
+    parser.add_argument('--budget-conversion-ms', type=float, help='首次转换中位数预算')
+    args = parser.parse_args(argv)
+
+    targets = []
+    if not args.no_script:
+        targets.append(('script', [sys.executable, os.path.abspath(args.script)]))
+    for value in args.exe:
+        name, path = parse_target(value)
+        targets.append((name, [os.path.abspath(path)]))
+    if not targets:
+        parser.error('没有要测量的目标')
+
+    sample = None
+    temp_dir = None
+    if not args.no_conversion:
+        if args.sample:
+            sample = os.path.abspath(args.sample)
+        else:
+            temp_dir = tempfile.TemporaryDirectory(prefix='srt2ass_bench_')
+            sample = os.path.join(temp_dir.name, 'sample.srt')
+            write_sample_srt(sample)
+
+    try:
+        results = {}
+        for name, command in targets:
+            results[name] = bench_target(name, command, args.runs, sample,
+                                         args.offscreen, args.timeout)
+    finally:
+        if temp_dir:
+            temp_dir.cleanup()
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'platform': sys.platform,
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    failures = check_budget(results, args.budget_window_ms, args.budget_conversion_ms)
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
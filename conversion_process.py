@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在独立子进程中执行转换
+pysubs2 解析和 OpenCC 转换都是纯Python代码，在界面进程的线程池里运行时会与界面线程争抢GIL，
+大批量转换时拖拽、提示条动画和托盘菜单都会卡顿。这里把转换交给一个子进程，
+界面进程的工作线程只通过队列发送任务并等待结果，等待期间不占用GIL。
+子进程无法启动或意外退出时抛出 ConversionProcessUnavailable，调用方改回在本进程转换。
+子进程在界面显示后立即启动，预热（导入模块、加载OpenCC词典、TLS握手）也通过队列在子进程中完成。
+"""
+
+import os
+import sys
+import types
+import queue
+import atexit
+import threading
+import importlib.util
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from subtitle_engine import FileReport, api_stats, convert_file, prewarm
+
+PROCESS_WORKERS = max(2, min(8, os.cpu_count() or 2))
+POLL_INTERVAL = 1.0  # 秒，检查对方进程是否还在运行的间隔
+PROCESS_RETRY_INTERVAL = 60.0  # 秒，界面两次启动转换子进程之间的最短间隔
+
+
+class ConversionProcessUnavailable(RuntimeError):
+    """转换子进程不可用，调用方应在本进程内转换"""
+
+
+class ConversionFailed(RuntimeError):
+    """子进程中的转换失败，消息为失败原因"""
+
+
+def _serve(requests, results, workers):
+    """子进程入口：接收任务，用线程池转换，结果和进度写回结果队列"""
+    parent = multiprocessing.parent_process()
+    options_by_id = {}
+    prewarm()
+
+    def run(job_id, options, srt_file, ass_file):
+        results.put(('started', job_id))
+        report = FileReport(srt_file, ass_file)
+        try:
+            message = convert_file(srt_file, ass_file, options, report)
+            results.put(('done', job_id, message, report, api_stats()))
+        except Exception as e:
+            results.put(('failed', job_id, str(e), report, api_stats()))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            try:
+                message = requests.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    return  # 界面进程已退出
+                continue
+            if message is None:
+                return
+            kind = message[0]
+            if kind == 'prewarm':
+                executor.submit(prewarm, message[1])
+            elif kind == 'options':
+                _, options_id, options = message
+                options_by_id[options_id] = options
+                if options.convert_to_china:
+                    executor.submit(prewarm, True)
+            elif kind == 'forget':
+                options_by_id.pop(message[1], None)
+            elif kind == 'convert':
+                _, job_id, options_id, srt_file, ass_file = message
+                executor.submit(run, job_id, options_by_id[options_id], srt_file, ass_file)
+
+
+@contextmanager
+def _light_main():
+    """启动子进程期间把 __main__ 换成本模块
+    spawn 会在子进程中重新执行主模块，界面程序的主模块会导入 PyQt5 和界面库，拖慢第一个文件的转换"""
+    main = sys.modules['__main__']
+    if __name__ == '__main__' or getattr(sys, 'frozen', False):
+        yield  # 打包后的程序由 freeze_support 处理子进程
+        return
+    light = types.ModuleType('__main__')
+    light.__spec__ = importlib.util.find_spec(__name__)
+    sys.modules['__main__'] = light
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+class _PendingJob:
+    """等待子进程结果的任务"""
+
+    __slots__ = ('report', 'on_started', 'result', 'done')
+
+    def __init__(self, report, on_started):
+        self.report = report
+        self.on_started = on_started
+        self.result = None
+        self.done = threading.Event()
+
+
+class ConversionProcess:
+    """转换子进程的代理，可被多个工作线程同时调用"""
+
+    def __init__(self, workers=PROCESS_WORKERS):
+        # 界面进程中有Qt的线程，fork 不安全，统一用 spawn
+        context = multiprocessing.get_context('spawn')
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._process = context.Process(target=_serve, args=(self._requests, self._results, workers),
+                                        name='SrtToAssConversion')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._options = {}  # 已发给子进程的批次选项: id -> 选项对象（保持引用，id 不会被复用）
+        self._next_job = 0
+        self._broken = False
+        self.last_api_stats = None
+
+    def start(self):
+        """启动子进程和结果读取线程"""
+        with _light_main():
+            self._process.start()
+        # 子进程不是守护进程（分片转换需要再创建进程），退出时要先通知它结束，否则解释器会一直等待
+        atexit.register(self.shutdown)
+        threading.Thread(target=self._read_results, name='ConversionProcessReader', daemon=True).start()
+
+    def is_available(self):
+        return not self._broken and self._process.is_alive()
+
+    def prewarm(self, convert_to_china=False):
+        """在子进程中预热转换资源，立即返回"""
+        with self._lock:
+            if self.is_available():
+                self._requests.put(('prewarm', convert_to_china))
+
+    def api_stats(self):
+        """子进程中在线转换的最新统计，供批次报告使用"""
+        return self.last_api_stats or api_stats()
+
+    def convert(self, srt_file, ass_file, options, report, on_started=None):
+        """在子进程中转换一个文件并等待结果，返回完成消息
+        转换失败时抛出 ConversionFailed，子进程不可用时抛出 ConversionProcessUnavailable"""
+        job = _PendingJob(report, on_started)
+        with self._lock:
+            if not self.is_available():
+                raise ConversionProcessUnavailable("转换进程未运行")
+            options_id = id(options)
+            if options_id not in self._options:
+                self._options[options_id] = options
+                self._requests.put(('options', options_id, options))
+            job_id = self._next_job
+            self._next_job += 1
+            self._pending[job_id] = job
+            self._requests.put(('convert', job_id, options_id, srt_file, ass_file))
+
+        job.done.wait()
+        kind, message = job.result
+        if kind == 'done':
+            return message
+        if kind == 'failed':
+            raise ConversionFailed(message)
+        raise ConversionProcessUnavailable(message)
+
+    def forget_options(self, options):
+        """批次结束后通知子进程释放该批次的选项"""
+        with self._lock:
+            if self._options.pop(id(options), None) is not None and self.is_available():
+                self._requests.put(('forget', id(options)))
+
+    def _read_results(self):
+        """读取子进程发回的进度和结果，分发给等待中的任务"""
+        while True:
+            try:
+                message = self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    break
+                continue
+            except (EOFError, OSError):
+                break
+            kind, job_id = message[0], message[1]
+            with self._lock:
+                job = self._pending.get(job_id) if kind == 'started' else self._pending.pop(job_id, None)
+            if job is None:
+                continue
+            if kind == 'started':
+                if job.on_started is not None:
+                    job.on_started()
+                continue
+            _, _, text, report, stats = message
+            job.report.__dict__.update(report.__dict__)
+            self.last_api_stats = stats
+            job.result = (kind, text)
+            job.done.set()
+
+        # 子进程已退出，还在等待的任务改回本进程转换
+        with self._lock:
+            self._broken = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        if pending:
+            print(f"转换进程意外退出，{len(pending)} 个文件改在本进程转换")
+        for job in pending:
+            job.result = ('unavailable', "转换进程已退出")
+            job.done.set()
+
+    def shutdown(self, timeout=3):
+        """通知子进程退出，超时后强制结束"""
+        with self._lock:
+            self._broken = True
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+
+
+def start_conversion_process():
+    """启动转换子进程，无法启动时返回 None，调用方改用本进程的线程池"""
+    try:
+        process = ConversionProcess()
+        process.start()
+        return process
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"无法启动转换进程，改在本进程转换: {e}")
+        return None
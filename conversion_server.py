@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地转换服务
+通过 HTTP/JSON 提供字幕转换，供流水线中的其他工具调用，无需启动界面:
+    python conversion_server.py [--host 127.0.0.1] [--port 8765] [--workers 4]
+
+接口:
+    GET  /health    服务状态
+    GET  /options   可用的样式方案和插入字幕配置
+    POST /convert   转换字幕
+        JSON 请求体: {"text": 字幕内容, "format": "srt"} 或 {"path": 源文件, "output": 输出文件(可选)}
+                     可选字段 insert_options, style_profile, convert_to_china, api_priority
+        其他请求体视为字幕原文，参数放在查询字符串中
+        (format, insert, style_profile, china=1, opencc_first=1)，直接返回ASS文本
+
+OpenCC词典、HTTP连接池、繁简转换缓存和每组参数对应的批次选项在请求之间保持，
+请求由固定大小的线程池处理。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from subtitle_engine import (build_convert_options, convert_file, convert_subtitle_text,
+                             get_http_session, get_opencc, load_app_settings)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 256 * 1024 * 1024
+
+
+def request_field(request, name, kind, default=None):
+    """取出请求中的字段并检查类型，类型不对时抛出 ValueError（返回400）
+    kind 为 bool、str 或 list（字符串列表）；字段缺失或为 null 时返回 default"""
+    value = request.get(name)
+    if value is None:
+        return default
+    if kind is list:
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise ValueError(f"{name} 必须是字符串列表")
+    elif not isinstance(value, kind):
+        # JSON 中的 "false" 是字符串，bool("false") 为真，不能直接转换
+        raise ValueError(f"{name} 必须是{'布尔值' if kind is bool else '字符串'}")
+    return value
+
+
+class ConversionService:
+    """转换服务状态：配置和批次选项在请求之间复用"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._options = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """提前加载OpenCC词典和HTTP会话，避免首个请求承担初始化开销"""
+        get_http_session()
+        try:
+            get_opencc()
+        except ImportError:
+            print("OpenCC未安装，本地繁简转换不可用")
+
+    def options_for(self, insert_options=(), style_profile=None, convert_to_china=False,
+                    api_priority=True):
+        """取得（或生成并缓存）一组参数对应的转换选项"""
+        key = (tuple(insert_options), style_profile, bool(convert_to_china), bool(api_priority))
+        with self._lock:
+            options = self._options.get(key)
+        if options is not None:
+            return options
+
+        settings = dict(self.settings)
+        if style_profile is not None:
+            if style_profile and style_profile not in settings['style_profiles']:
+                raise ValueError(f"样式方案不存在: {style_profile}")
+            settings['style_profile'] = style_profile
+        options = build_convert_options(settings, insert_options, False,
+                                        convert_to_china, api_priority)
+        with self._lock:
+            self._options[key] = options
+        return options
+
+    def describe(self):
+        """可用的样式方案和插入字幕配置"""
+        return {
+            'style_profiles': sorted(self.settings['style_profiles']),
+            'style_profile': self.settings['style_profile'],
+            'insert_options': [c.get('name') for c in self.settings['subtitle_configs']],
+        }
+
+    def convert(self, request):
+        """处理一次转换请求，返回响应字典"""
+        options = self.options_for(
+            request_field(request, 'insert_options', list, []),
+            request_field(request, 'style_profile', str),
+            request_field(request, 'convert_to_china', bool, False),
+            request_field(request, 'api_priority', bool, True),
+        )
+
+        path = request.get('path')
+        if path:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"文件不存在: {path}")
+            output = request.get('output')
+            if output:
+                return {'output': output, 'message': convert_file(path, output, options)}
+            with open(path, 'rb') as f:
+                source = f.read()
+            format_ = os.path.splitext(path)[1].lower().lstrip('.') or None
+        elif 'text' in request:
+            source = request['text']
+            format_ = request.get('format')
+        else:
+            raise ValueError("请求中需要 text 或 path")
+
+        ass_text, china_convert_failed = convert_subtitle_text(source, options, format_)
+        return {'ass': ass_text, 'china_convert_failed': china_convert_failed}
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """转换服务的请求处理"""
+
+    server_version = 'SrtToAssConverter'
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        route = urlsplit(self.path).path
+        if route == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif route == '/options':
+            self._send_json(200, self.server.service.describe())
+        else:
+            self._send_json(404, {'error': '接口不存在'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self._send_json(404, {'error': '接口不存在'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_SIZE:
+            self._send_json(413, {'error': '请求体过大'})
+            return
+        body = self.rfile.read(length)
+
+        is_json = self.headers.get('Content-Type', '').startswith('application/json')
+        started = time.perf_counter()
+        try:
+            if is_json:
+                request = json.loads(body.decode('utf-8'))
+                if not isinstance(request, dict):
+                    raise ValueError("请求体必须是JSON对象")
+            else:
+                query = parse_qs(url.query)
+                request = {
+                    'text': body,
+                    'format': query.get('format', [None])[0],
+                    'insert_options': query.get('insert', []),
+                    'style_profile': query.get('style_profile', [None])[0],
+                    'convert_to_china': query.get('china', ['0'])[0] == '1',
+                    'api_priority': query.get('opencc_first', ['0'])[0] != '1',
+                }
+            result = self.server.service.convert(request)
+        except FileNotFoundError as e:
+            self._send_json(404, {'error': str(e)})
+            return
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"转换失败: {e}"})
+            return
+
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        if is_json or 'ass' not in result:
+            self._send_json(200, result)
+        else:
+            self._send(200, result['ass'], 'text/x-ssa; charset=utf-8')
+
+
+class PooledHTTPServer(HTTPServer):
+    """用固定大小的线程池处理请求的HTTP服务器"""
+
+    def __init__(self, address, handler, service, workers):
+        super().__init__(address, handler)
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ConvertRequest')
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def main(argv=None):
+    """启动本地转换服务"""
+    parser = argparse.ArgumentParser(description='本地字幕转换服务')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='监听地址，默认只监听本机')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='同时处理的请求数')
+    args = parser.parse_args(argv)
+
+    service = ConversionService(load_app_settings())
+    service.warm_up()
+    server = PooledHTTPServer((args.host, args.port), ConversionRequestHandler,
+                              service, max(1, args.workers))
+    print(f"转换服务已启动: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("正在停止转换服务...")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
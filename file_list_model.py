@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件列表的模型/视图实现，两个界面共用
+QAbstractListModel 只为可见的行提供数据，几万个文件也不需要创建几万个列表项；
+转换状态的变化先记录下来，由定时器合并成一次 dataChanged 刷新。
+"""
+
+import os
+import time
+import threading
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+
+from subtitle_engine import is_subtitle_file, iter_subtitle_files, path_key
+
+STATUS_NONE = ''
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+
+STATUS_LABELS = {
+    STATUS_QUEUED: '等待中',
+    STATUS_RUNNING: '转换中',
+    STATUS_DONE: '完成',
+    STATUS_FAILED: '失败',
+    STATUS_SKIPPED: '已跳过',
+}
+
+# 各状态的文字颜色预先创建好，data() 里直接返回
+STATUS_COLORS = {
+    STATUS_QUEUED: QColor('#B0B0B0'),
+    STATUS_RUNNING: QColor('#00D4FF'),
+    STATUS_DONE: QColor('#6CCB5F'),
+    STATUS_FAILED: QColor('#FF6B6B'),
+    STATUS_SKIPPED: QColor('#E0A030'),
+}
+
+PathRole = Qt.UserRole
+StatusRole = Qt.UserRole + 1
+DurationRole = Qt.UserRole + 2
+
+FLUSH_INTERVAL_MS = 100
+SCAN_BATCH_SIZE = 500
+SCAN_BATCH_INTERVAL = 0.2  # 秒，文件较少时也按时把已找到的发出去
+CHANGED_ROLES = [Qt.DisplayRole, Qt.ToolTipRole, Qt.ForegroundRole, StatusRole, DurationRole]
+
+
+class FileEntry:
+    """列表中的一个文件及其转换状态"""
+
+    __slots__ = ('path', 'status', 'duration', 'message')
+
+    def __init__(self, path):
+        self.path = path
+        self.status = STATUS_NONE
+        self.duration = None
+        self.message = ''
+
+
+class FileListModel(QAbstractListModel):
+    """文件列表模型，按规范化路径去重"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.rows = {}  # 规范化路径 -> 行号，与 entries 保持同步
+        self._dirty = set()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            label = STATUS_LABELS.get(entry.status)
+            if not label:
+                return entry.path
+            if entry.duration is not None:
+                label = f"{label} {entry.duration:.1f}s"
+            return f"{entry.path}    [{label}]"
+        if role == Qt.ToolTipRole:
+            return entry.message or entry.path
+        if role == Qt.ForegroundRole:
+            return STATUS_COLORS.get(entry.status)
+        if role == PathRole:
+            return entry.path
+        if role == StatusRole:
+            return entry.status
+        if role == DurationRole:
+            return entry.duration
+        return None
+
+    def add_files(self, files):
+        """批量添加文件并去重，返回新增数量"""
+        new_entries = []
+        for file in files:
+            key = path_key(file)
+            if key not in self.rows:
+                self.rows[key] = len(self.entries) + len(new_entries)
+                new_entries.append(FileEntry(file))
+        if new_entries:
+            first = len(self.entries)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_entries) - 1)
+            self.entries.extend(new_entries)
+            self.endInsertRows()
+        return len(new_entries)
+
+    def remove_rows(self, rows):
+        """删除指定的行"""
+        rows = sorted(set(rows), reverse=True)
+        if not rows:
+            return
+        # 连续的行合并成一次删除
+        end = start = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self.entries[start:end + 1]
+            self.endRemoveRows()
+            end = start = row
+        self.rows = {path_key(entry.path): row for row, entry in enumerate(self.entries)}
+        self._dirty.clear()
+
+    def clear(self):
+        """清空列表"""
+        self.beginResetModel()
+        self.entries = []
+        self.rows = {}
+        self._dirty.clear()
+        self.endResetModel()
+
+    def file_paths(self):
+        """按列表顺序返回所有文件"""
+        return [entry.path for entry in self.entries]
+
+    def set_status(self, path, status, duration=None, message=''):
+        """更新一个文件的状态，刷新会合并到下一次定时器触发"""
+        row = self.rows.get(path_key(path))
+        if row is None:
+            return
+        entry = self.entries[row]
+        entry.status = status
+        entry.duration = duration
+        entry.message = message
+        self._dirty.add(row)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def set_all_status(self, status):
+        """把所有文件设为同一状态，立即刷新"""
+        for entry in self.entries:
+            entry.status = status
+            entry.duration = None
+            entry.message = ''
+        self._dirty.clear()
+        if self.entries:
+            self.dataChanged.emit(self.index(0), self.index(len(self.entries) - 1), CHANGED_ROLES)
+
+    def flush(self):
+        """发出累计的状态变化"""
+        if not self._dirty:
+            return
+        first, last = min(self._dirty), max(self._dirty)
+        self._dirty.clear()
+        self.dataChanged.emit(self.index(first), self.index(last), CHANGED_ROLES)
+
+
+def mime_has_local_paths(mime_data):
+    """拖拽数据中是否有本地路径，只检查字符串，不访问文件系统（目录无法按扩展名识别，一律接受）"""
+    if not mime_data.hasUrls():
+        return False
+    return any(url.toLocalFile() for url in mime_data.urls())
+
+
+def paths_from_mime(mime_data):
+    """从拖拽数据中取出本地路径，按扩展名分为字幕文件和其他路径，不访问文件系统
+    其他路径可能是目录，交给 DirectoryScanner 在后台线程判断并扫描，网络路径也不会卡住界面"""
+    files, others = [], []
+    if not mime_data.hasUrls():
+        return files, others
+    for url in mime_data.urls():
+        path = url.toLocalFile()
+        if not path:
+            continue
+        if is_subtitle_file(path):
+            files.append(path)
+        else:
+            others.append(path)
+    return files, others
+
+
+class DirectoryScanner(QObject):
+    """在后台线程递归扫描目录，把找到的字幕文件分批发给界面线程
+    传入的路径不必都是目录，不是目录的在后台线程中跳过"""
+
+    batch_found = pyqtSignal(list)
+    finished = pyqtSignal(int)  # 共找到的文件数
+
+    def __init__(self, directories, parent=None):
+        super().__init__(parent)
+        self.directories = list(directories)
+        self.added_count = 0  # 实际加入列表的文件数（去掉已在列表中的），由界面累计
+        self._cancelled = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name='DirectoryScanner', daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self):
+        total = 0
+        batch = []
+        last_emit = time.monotonic()
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue  # 拖入的非字幕文件
+            for path in iter_subtitle_files(directory):
+                if self._cancelled.is_set():
+                    self.finished.emit(total)
+                    return
+                batch.append(path)
+                if len(batch) >= SCAN_BATCH_SIZE or time.monotonic() - last_emit >= SCAN_BATCH_INTERVAL:
+                    total += len(batch)
+                    self.batch_found.emit(batch)
+                    batch = []
+                    last_emit = time.monotonic()
+        if batch:
+            total += len(batch)
+            self.batch_found.emit(batch)
+        self.finished.emit(total)
+
+
+class FileListView(QListView):
+    """支持拖拽的文件列表视图
+    样式表在创建时设置一次，拖拽高亮通过 dragActive 属性切换，不再重新解析样式表"""
+
+    files_dropped = pyqtSignal(list)
+    directories_dropped = pyqtSignal(list)  # 不是字幕文件的拖入路径，可能是目录，由扫描线程判断
+
+    def __init__(self, placeholder_text='', parent=None):
+        super().__init__(parent)
+        self.placeholder_text = placeholder_text
+        self.file_model = FileListModel(self)
+        self.setModel(self.file_model)
+        self.setUniformItemSizes(True)  # 所有行等高，滚动时无需逐行计算尺寸
+        self.setLayoutMode(QListView.Batched)
+        self.setAcceptDrops(True)
+        self.setDragDropMode(QAbstractItemView.DropOnly)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setProperty('dragActive', False)
+        self._drag_acceptable = False  # 拖拽进入时判断一次，移动时直接使用
+
+    def set_drag_active(self, active):
+        """切换拖拽高亮状态"""
+        if self.property('dragActive') == active:
+            return
+        self.setProperty('dragActive', active)
+        self.style().unpolish(self)
+        self.style().polish(self)
+        self.viewport().update()
+
+    def add_files(self, files):
+        return self.file_model.add_files(files)
+
+    def file_paths(self):
+        return self.file_model.file_paths()
+
+    def count(self):
+        return self.file_model.rowCount()
+
+    def set_status(self, path, status, duration=None, message=''):
+        self.file_model.set_status(path, status, duration, message)
+
+    def set_all_status(self, status):
+        self.file_model.set_all_status(status)
+
+    def remove_selected(self):
+        """删除选中的文件"""
+        self.file_model.remove_rows(index.row() for index in self.selectionModel().selectedRows())
+
+    def clear_files(self):
+        self.file_model.clear()
+
+    def dragEnterEvent(self, event):
+        """拖拽进入事件"""
+        self._drag_acceptable = mime_has_local_paths(event.mimeData())
+        if self._drag_acceptable:
+            event.acceptProposedAction()
+            self.set_drag_active(True)
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        """拖拽移动事件"""
+        if self._drag_acceptable:
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragLeaveEvent(self, event):
+        """拖拽离开事件"""
+        self.set_drag_active(False)
+        event.accept()
+
+    def dropEvent(self, event):
+        """拖拽放下事件"""
+        self.set_drag_active(False)
+        files, directories = paths_from_mime(event.mimeData())
+        if files:
+            self.files_dropped.emit(files)
+        if directories:
+            self.directories_dropped.emit(directories)
+        if files or directories:
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.file_model.rowCount() or not self.placeholder_text:
+            return
+        # 列表为空时显示提示文字
+        painter = QPainter(self.viewport())
+        painter.setPen(self.palette().placeholderText().color())
+        painter.drawText(self.viewport().rect(), Qt.AlignCenter | Qt.TextWordWrap, self.placeholder_text)
+        painter.end()
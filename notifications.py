@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+界面通知合并，两个界面共用
+批量转换时每个失败的文件都会产生一条通知，逐条显示会创建大量带动画的提示条。
+这里把一个时间窗口内的通知合并成一条汇总，无论批次多大，每个窗口最多显示一次。
+"""
+
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QTimer
+
+NOTIFY_INTERVAL_MS = 1000
+# 合并后的提示条类型取最严重的一种
+SEVERITY = {'info': 0, 'success': 1, 'warning': 2, 'error': 3}
+
+
+class NotificationAggregator(QObject):
+    """按时间窗口合并通知，通过 show(标题, 内容, 类型) 回调显示"""
+
+    def __init__(self, show, interval_ms=NOTIFY_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.show = show
+        self.interval_ms = interval_ms
+        self.pending = OrderedDict()  # (标题, 类型) -> 窗口内最近一条内容
+        self.totals = {}              # (标题, 类型) -> 本批次累计数量
+        self._last_flush = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def add(self, title, content, bar_type='info'):
+        """记录一条通知，距上次显示超过一个窗口时立即显示，否则等窗口结束"""
+        key = (title, bar_type)
+        self.pending[key] = content
+        self.totals[key] = self.totals.get(key, 0) + 1
+        if self._timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        self._timer.start(int(max(0, self.interval_ms - elapsed_ms)))
+
+    def flush(self):
+        """显示窗口内累计的通知"""
+        self._timer.stop()
+        if not self.pending:
+            return
+        pending = list(self.pending.items())
+        self.pending.clear()
+        self._last_flush = time.monotonic()
+
+        if len(pending) == 1 and self.totals[pending[0][0]] == 1:
+            (title, bar_type), content = pending[0]
+            self.show(title, content, bar_type)
+            return
+
+        lines = []
+        for key, content in pending:
+            lines.append(f"{key[0]} 共 {self.totals[key]} 个，最近: {content}")
+        bar_type = max((key[1] for key, _ in pending), key=lambda t: SEVERITY.get(t, 0))
+        title = pending[0][0][0] if len(pending) == 1 else "转换通知"
+        self.show(title, '\n'.join(lines), bar_type)
+
+    def count(self, title, bar_type='info'):
+        """本批次某类通知的累计数量"""
+        return self.totals.get((title, bar_type), 0)
+
+    def reset(self):
+        """新批次开始时清空累计数量"""
+        self._timer.stop()
+        self.pending.clear()
+        self.totals.clear()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次转换报告查看窗口，两个界面共用
+读取批次结束时写出的 JSON 报告，用表格列出每个文件的结果，可按状态筛选和排序
+"""
+
+import os
+import subprocess
+import sys
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
+                             QTableView, QPushButton, QHeaderView, QAbstractItemView)
+
+from file_list_model import STATUS_LABELS, STATUS_COLORS
+from subtitle_engine import load_batch_report
+
+# (表头, 字段)
+REPORT_COLUMNS = (
+    ('文件', 'source'),
+    ('状态', 'status'),
+    ('字幕条数', 'cues'),
+    ('耗时(ms)', 'total_ms'),
+    ('读取(ms)', 'load_ms'),
+    ('处理(ms)', 'process_ms'),
+    ('写入(ms)', 'write_ms'),
+    ('输入字节', 'bytes_in'),
+    ('输出字节', 'bytes_out'),
+    ('备注', 'note'),
+)
+STATUS_COLUMN = 1
+NUMERIC_FIELDS = {'cues', 'total_ms', 'load_ms', 'process_ms', 'write_ms', 'bytes_in', 'bytes_out'}
+
+
+def report_note(row):
+    """备注列：失败原因、跳过原因或繁体转换的备选情况"""
+    if row.get('status') != 'done':
+        return row.get('message', '')
+    return '; '.join(row.get('fallbacks', []))
+
+
+class ReportTableModel(QAbstractTableModel):
+    """报告中的文件列表"""
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(REPORT_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return REPORT_COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        field = REPORT_COLUMNS[index.column()][1]
+        value = report_note(row) if field == 'note' else row.get(field)
+        if role == Qt.DisplayRole:
+            if field == 'source':
+                return os.path.basename(value)
+            if field == 'status':
+                return STATUS_LABELS.get(value, value)
+            return value
+        if role == Qt.EditRole:
+            return value  # 排序时按原始值比较
+        if role == Qt.ToolTipRole:
+            if field == 'source':
+                return f"{value}\n→ {row.get('output', '')}"
+            if field == 'note':
+                return value
+        if role == Qt.ForegroundRole and field == 'status':
+            return STATUS_COLORS.get(value)
+        if role == Qt.TextAlignmentRole and field in NUMERIC_FIELDS:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+
+class BatchReportDialog(QDialog):
+    """批次转换报告窗口"""
+
+    FILTERS = (('全部', ''), ('完成', 'done'), ('失败', 'failed'), ('已跳过', 'skipped'))
+
+    def __init__(self, report_path, parent=None):
+        super().__init__(parent)
+        self.report_path = report_path
+        report = load_batch_report(report_path)
+        summary = report['summary']
+
+        self.setWindowTitle("转换报告")
+        self.resize(900, 520)
+        layout = QVBoxLayout(self)
+
+        summary_label = QLabel(
+            f"开始于 {summary['started_at']}，用时 {summary['elapsed_s']} 秒  |  "
+            f"共 {summary['total']} 个：完成 {summary['done']}，失败 {summary['failed']}，"
+            f"跳过 {summary['skipped']}，繁体转换失败 {summary['china_convert_failed']}"
+        )
+        online = summary.get('online_api')
+        if online and online['requests']:
+            summary_label.setText(summary_label.text() + (
+                f"\n在线转换: 请求 {online['requests']} 次（限流 {online['throttled']}，失败 {online['errors']}），"
+                f"并发上限 {online['limit']}，延迟 p50/p90/p99 = "
+                f"{online['p50_ms']}/{online['p90_ms']}/{online['p99_ms']} ms"
+            ))
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("显示:"))
+        self.filter_combo = QComboBox()
+        for text, status in self.FILTERS:
+            self.filter_combo.addItem(text, status)
+        self.filter_combo.currentIndexChanged.connect(self.on_filter_changed)
+        filter_layout.addWidget(self.filter_combo)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        self.model = ReportTableModel(report['files'], self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(Qt.EditRole)
+        self.proxy.setFilterRole(Qt.EditRole)
+        self.proxy.setFilterKeyColumn(STATUS_COLUMN)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        path_label = QLabel(report_path)
+        path_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        button_layout.addWidget(path_label)
+        button_layout.addStretch()
+        open_button = QPushButton("打开报告所在文件夹")
+        open_button.clicked.connect(self.open_report_folder)
+        button_layout.addWidget(open_button)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def on_filter_changed(self, index):
+        status = self.filter_combo.itemData(index)
+        self.proxy.setFilterFixedString(status)
+
+    def open_report_folder(self):
+        folder = os.path.dirname(os.path.abspath(self.report_path))
+        try:
+            if sys.platform == 'win32':
+                subprocess.run(['explorer', folder])
+            elif sys.platform == 'darwin':
+                subprocess.run(['open', folder])
+            else:
+                subprocess.run(['xdg-open', folder])
+        except Exception as e:
+            print(f"无法打开文件夹 {folder}: {e}")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+超大字幕文件的分片繁体转换
+直播字幕存档等文件可能有上百万条字幕，按文件并行无济于事。这里把事件按连续区间分片，
+交给进程池用本地OpenCC转换；文本通过 multiprocessing.shared_memory 传递，不逐条序列化，
+各分片的结果按原顺序写回事件。任何一片失败或超时时，该片在本进程内按原方式转换。
+API优先时先与其他文件一样交给在线API，只有在线转换失败、改用OpenCC时才分片，转换结果不因文件大小而不同。
+"""
+
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+
+from subtitle_engine import ChinaConverter, get_opencc
+
+SHARD_MIN_EVENTS = 200000  # 事件数达到此值才分片，较小的文件启动进程得不偿失
+SHARD_MAX_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+TEXT_SEPARATOR = '\0'  # 事件文本中不会出现的分隔符
+OUTPUT_CAPACITY_FACTOR = 2  # 输出区按输入字节数的两倍预留，繁简转换后长度变化很小
+SHARD_TIMEOUT = 300  # 秒，等待所有分片的总时间，超时的分片改在本进程转换
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def get_process_pool():
+    """取得共享的进程池，首次使用时创建
+    其他工作线程可能正持有OpenCC或缓存的锁，fork 出的子进程会继承这些锁而卡死，统一用 spawn"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=SHARD_MAX_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _discard_process_pool(pool):
+    """有分片超时时丢弃进程池，下次分片重新创建，不再等待卡住的子进程"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def should_shard(events):
+    """事件数足够多且本地OpenCC可用时才分片"""
+    if len(events) < SHARD_MIN_EVENTS or SHARD_MAX_WORKERS < 2:
+        return False
+    try:
+        get_opencc()
+    except ImportError:
+        return False  # 没有OpenCC时子进程只能逐片请求在线API，不如合并请求
+    return True
+
+
+class _ApiOnlyConverter(ChinaConverter):
+    """只尝试在线API，失败时不在本进程改用OpenCC，由分片转换接手"""
+
+    def __init__(self):
+        super().__init__(api_priority=True)
+
+    def _convert_uncached(self, text, notes=None):
+        return self._try_api_convert(text)
+
+
+def convert_large_events(events, converter, notes=None):
+    """转换超大文件的事件文本，返回是否有转换失败
+    OpenCC优先时直接分片；API优先时先交给在线API，失败后再把OpenCC转换分片"""
+    if not converter.api_priority:
+        return convert_events_sharded(events, converter, notes)
+    if not _ApiOnlyConverter().convert_events(events):
+        return False
+    if notes is not None:
+        notes.append('在线API失败，改用OpenCC（分片转换）')
+    # 已由在线API转换的片段已是简体，再经OpenCC转换不会改变
+    return convert_events_sharded(events, ChinaConverter(api_priority=False), notes)
+
+
+class _ShardText:
+    """子进程中代替字幕事件，只携带文本"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+def _attach(name):
+    """子进程打开父进程创建的共享内存，由父进程负责释放
+    子进程与父进程共用同一个资源跟踪器，3.13 之前重复登记无害；3.13 起直接不登记"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _convert_shard(input_name, input_offset, input_length, output_name, output_offset, output_capacity):
+    """在子进程中转换一片文本，结果写入输出区
+    返回 (写入的字节数, 是否有转换失败, 备注)，输出区不够时字节数为 -1"""
+    source = _attach(input_name)
+    destination = _attach(output_name)
+    try:
+        data = bytes(source.buf[input_offset:input_offset + input_length])
+        items = [_ShardText(text) for text in data.decode('utf-8').split(TEXT_SEPARATOR)]
+        notes = []
+        # 分片只用本地OpenCC，OpenCC失败时才会尝试在线API
+        failed = ChinaConverter(api_priority=False).convert_events(items, notes)
+        result = TEXT_SEPARATOR.join(item.text for item in items).encode('utf-8')
+        if len(result) > output_capacity:
+            return -1, failed, notes
+        destination.buf[output_offset:output_offset + len(result)] = result
+        return len(result), failed, notes
+    finally:
+        source.close()
+        destination.close()
+
+
+def convert_events_sharded(events, converter, notes=None):
+    """分片用OpenCC转换所有事件文本，返回是否有转换失败
+    converter 为OpenCC优先的 ChinaConverter，无法分片处理的区间用它在本进程内转换"""
+    texts = [event.text or '' for event in events]
+    shard_count = min(len(events), SHARD_MAX_WORKERS * 2)
+    step = -(-len(events) // shard_count)
+    ranges = [(start, min(start + step, len(events))) for start in range(0, len(events), step)]
+
+    chunks = []
+    for start, end in ranges:
+        chunk = TEXT_SEPARATOR.join(texts[start:end]).encode('utf-8')
+        if chunk.count(TEXT_SEPARATOR.encode()) != end - start - 1:
+            # 文本中本身含有分隔符，无法分片
+            return converter.convert_events(events, notes)
+        chunks.append(chunk)
+
+    input_size = sum(len(chunk) for chunk in chunks)
+    output_size = sum(len(chunk) * OUTPUT_CAPACITY_FACTOR + 64 for chunk in chunks)
+    source = shared_memory.SharedMemory(create=True, size=max(1, input_size))
+    destination = shared_memory.SharedMemory(create=True, size=max(1, output_size))
+    failed = False
+    try:
+        jobs = []
+        input_offset = output_offset = 0
+        for chunk in chunks:
+            source.buf[input_offset:input_offset + len(chunk)] = chunk
+            capacity = len(chunk) * OUTPUT_CAPACITY_FACTOR + 64
+            jobs.append((input_offset, len(chunk), output_offset, capacity))
+            input_offset += len(chunk)
+            output_offset += capacity
+
+        pool = get_process_pool()
+        futures = [pool.submit(_convert_shard, source.name, input_offset, length,
+                               destination.name, output_offset, capacity)
+                   for input_offset, length, output_offset, capacity in jobs]
+        deadline = time.monotonic() + SHARD_TIMEOUT
+        timed_out = False
+
+        # 按分片顺序取回结果，保证写回的顺序与原文件一致
+        for (start, end), (_, _, output_offset, _), future in zip(ranges, jobs, futures):
+            shard_events = events[start:end]
+            try:
+                written, shard_failed, shard_notes = future.result(max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                print(f"分片 {start}-{end} 转换超时，改在本进程转换")
+                timed_out = True
+                written = -1
+            except Exception as e:
+                print(f"分片 {start}-{end} 转换失败，改在本进程转换: {e}")
+                written = -1
+            if written < 0:
+                failed = converter.convert_events(shard_events, notes) or failed
+                continue
+            converted = bytes(destination.buf[output_offset:output_offset + written]).decode('utf-8')
+            converted = converted.split(TEXT_SEPARATOR)
+            if len(converted) != len(shard_events):
+                failed = converter.convert_events(shard_events, notes) or failed
+                continue
+            for event, text in zip(shard_events, converted):
+                event.text = text
+            failed = failed or shard_failed
+            if notes is not None:
+                notes.extend(shard_notes)
+        if timed_out:
+            _discard_process_pool(pool)
+    finally:
+        source.close()
+        source.unlink()
+        destination.close()
+        destination.unlink()
+    return failed
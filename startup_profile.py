@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时统计
+设置环境变量 SRT2ASS_STARTUP_PROFILE=1 后，界面启动时在控制台输出各阶段耗时，
+超出预算时给出提示。需要细到单个模块时可配合 python -X importtime 使用。
+设置 SRT2ASS_BENCH_OUTPUT 时进入基准测试模式（见 bench_startup.py）：
+首帧显示后把时间戳写入该文件，可选地用 SRT2ASS_BENCH_CONVERT 指定的字幕做一次转换，然后退出。
+"""
+
+import os
+import sys
+import json
+import time
+
+STARTUP_BUDGET_MS = float(os.environ.get('SRT2ASS_STARTUP_BUDGET_MS', 1500))
+enabled = os.environ.get('SRT2ASS_STARTUP_PROFILE') == '1'
+bench_output = os.environ.get('SRT2ASS_BENCH_OUTPUT')
+bench_convert = os.environ.get('SRT2ASS_BENCH_CONVERT')
+
+_started = time.perf_counter()
+_marks = []
+
+
+def mark(stage):
+    """记录一个启动阶段的完成时间"""
+    _marks.append((stage, (time.perf_counter() - _started) * 1000))
+
+
+def elapsed_ms():
+    """从本模块导入（即进程开始加载界面代码）到现在的毫秒数"""
+    return (time.perf_counter() - _started) * 1000
+
+
+def report(budget_ms=STARTUP_BUDGET_MS):
+    """输出各阶段耗时，返回总耗时"""
+    total = elapsed_ms()
+    if not enabled:
+        return total
+    previous = 0.0
+    print("启动耗时:", file=sys.stderr)
+    for stage, at in _marks:
+        print(f"  {stage:<16} +{at - previous:8.1f} ms  (累计 {at:8.1f} ms)", file=sys.stderr)
+        previous = at
+    status = "超出预算" if total > budget_ms else "预算内"
+    print(f"  首帧总计 {total:.1f} ms / 预算 {budget_ms:.0f} ms ({status})", file=sys.stderr)
+    return total
+
+
+def finish_startup(app):
+    """首帧显示后调用：输出耗时，基准测试模式下记录结果并退出"""
+    total = report()
+    if not bench_output:
+        return
+
+    # 写绝对时间戳，由测试脚本减去进程创建时间，这样也能算上单文件版的解包耗时
+    result = {'first_window': time.time(), 'first_window_in_process_ms': total}
+    if bench_convert:
+        from subtitle_engine import build_convert_options, convert_text, load_app_settings
+        options = build_convert_options(load_app_settings())
+        format_ = os.path.splitext(bench_convert)[1].lower().lstrip('.') or None
+        with open(bench_convert, 'rb') as f:
+            convert_text(f, options, format_)
+        result['first_conversion'] = time.time()
+    with open(bench_output, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    app.quit()
@@ -0,0 +1,1571 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字幕转换核心组件
+与界面无关的转换逻辑，由 toAss.py 和 toAss_standard_qt.py 共用
+"""
+
+import io
+import os
+import re
+import sys
+import csv
+import json
+import time
+import threading
+from collections import OrderedDict, deque, namedtuple
+
+# pysubs2、requests 和 opencc 在首次使用时才导入，避免拖慢界面启动
+
+CONFIG_FILE = 'sub.json'
+SETTINGS_FILE = 'settings.json'
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt', '.ass')
+OUTPUT_FORMATS = ('ass', 'srt', 'vtt')  # 可同时写出的输出格式，SRT和VTT写在ASS输出旁边，只换扩展名
+NO_INSERT_OPTION = '不插入字幕'
+DEFAULT_FONT_FAMILY = '方正粗圆_GBK'
+DEFAULT_FONT_SIZE = 70
+DEFAULT_PLAY_RES = (1920, 1080)
+DEFAULT_SCRIPT_INFO = (
+    ('Title', 'Default Aegisub file'),
+    ('ScriptType', 'v4.00+'),
+    ('WrapStyle', '0'),
+    ('ScaledBorderAndShadow', 'yes'),
+    ('YCbCr Matrix', 'TV.601'),
+)
+COLOR_FIELDS = ('primarycolor', 'secondarycolor', 'tertiarycolor', 'outlinecolor', 'backcolor')
+# 按分辨率缩放的样式字段，字号等以 1080p 为准设置
+SCALED_STYLE_FIELDS = ('fontsize', 'outline', 'shadow', 'spacing', 'marginl', 'marginr', 'marginv')
+INVALID_FILENAME_CHARS = set('\\/:*?"<>|')
+EVENTS_SECTION = '[Events]'
+# 输出文件重名时的处理方式
+OUTPUT_COLLISION_SUFFIX = 'suffix'  # 文件名后加序号
+OUTPUT_COLLISION_MIRROR = 'mirror'  # 按原目录结构分到子目录
+OUTPUT_COLLISION_SKIP = 'skip'      # 只转换第一个，其余跳过
+OUTPUT_COLLISION_SCHEMES = {
+    OUTPUT_COLLISION_SUFFIX: '添加序号',
+    OUTPUT_COLLISION_MIRROR: '按原目录分开',
+    OUTPUT_COLLISION_SKIP: '跳过重名文件',
+}
+# 输出目录结构
+OUTPUT_LAYOUT_FLAT = 'flat'      # 全部放在输出目录下
+OUTPUT_LAYOUT_MIRROR = 'mirror'  # 在输出目录下重建源文件的目录结构
+OUTPUT_LAYOUTS = {
+    OUTPUT_LAYOUT_FLAT: '全部放在输出目录',
+    OUTPUT_LAYOUT_MIRROR: '保留原目录结构',
+}
+# 线程池中的任务优先级：转换进行中添加的文件插到批次中剩余文件的前面
+JOB_PRIORITY_BATCH = 0
+JOB_PRIORITY_INTERACTIVE = 10
+ZHCONVERT_URL = 'https://api.zhconvert.org/convert'
+HTTP_POOL_SIZE = 16
+T2S_CACHE_SIZE = 65536  # 按字幕片段缓存，条目都很短
+API_CONNECT_TIMEOUT = 3  # 秒，连接超时短一些，离线时尽快改用本地转换
+API_READ_TIMEOUT = 10
+API_BREAKER_THRESHOLD = 3  # 连续失败多少次后暂停在线转换
+API_BREAKER_RESET = 30     # 秒，暂停后多久放行一次试探请求
+API_CONCURRENCY_INITIAL = 4  # 在线请求的初始并发上限，之后按延迟和限流情况调整
+API_LATENCY_TARGET = 2.0     # 秒，延迟低于此值时才提高并发
+API_LATENCY_SAMPLES = 200    # 计算延迟分位数时保留的最近样本数
+API_THROTTLE_STATUS = (429, 503)
+API_BATCH_WINDOW = 0.03  # 秒，合并多个文件的在线转换请求的等待时间
+API_BATCH_MAX_CHARS = 50000
+API_BATCH_SEPARATOR = '\n@@SRT2ASS_BATCH@@\n'  # 纯ASCII分隔行，转换时不会被改动
+TIME_PATTERN = re.compile(r'(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
+# 事件文本中不参与繁体转换的部分：特效标签块、\N \n \h 转义和换行
+ASS_PROTECTED_PATTERN = re.compile(r'(\{[^}]*\}|\\[Nnh]|\n)')
+DRAWING_MODE_PATTERN = re.compile(r'\\p(\d+)')
+CJK_PATTERN = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+# 预编译后的插入字幕：时间为毫秒，文本已校验
+InsertTemplate = namedtuple('InsertTemplate', ['name', 'start', 'end', 'text'])
+
+
+class InsertConfigError(ValueError):
+    """插入字幕配置无效"""
+
+
+def parse_time_ms(value):
+    """把 'HH:mm:ss.zzz' 格式的时间解析为毫秒"""
+    match = TIME_PATTERN.fullmatch(value.strip()) if isinstance(value, str) else None
+    if not match:
+        raise ValueError(f"时间格式错误: {value!r}，应为 HH:mm:ss.zzz")
+    hours, minutes, seconds, millis = (int(part) for part in match.groups())
+    if minutes >= 60 or seconds >= 60:
+        raise ValueError(f"时间超出范围: {value!r}")
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+
+def validate_ass_text(text):
+    """校验插入的ASS语句，换行统一转换为 \\N"""
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("ASS语句为空")
+    text = text.replace('\r\n', '\n').replace('\r', '\n').strip('\n').replace('\n', '\\N')
+    depth = 0
+    for char in text:
+        if char == '{':
+            depth += 1
+            if depth > 1:
+                raise ValueError("ASS语句中的特效标签 {} 不能嵌套")
+        elif char == '}':
+            depth -= 1
+            if depth < 0:
+                raise ValueError("ASS语句中的特效标签 {} 不匹配")
+    if depth:
+        raise ValueError("ASS语句中的特效标签 {} 不匹配")
+    return text
+
+
+class InsertTemplates:
+    """一个批次的插入字幕模板，编译一次后由所有工作线程共享（只读）"""
+
+    def __init__(self, templates=()):
+        self.templates = tuple(templates)
+        self.index = {template.name: template for template in self.templates}
+
+    def __len__(self):
+        return len(self.templates)
+
+    def __iter__(self):
+        return iter(self.templates)
+
+    def make_events(self):
+        """为单个文件生成插入事件（每个文件拿到独立的事件对象）"""
+        import pysubs2
+        return [pysubs2.SSAEvent(start=t.start, end=t.end, text=t.text) for t in self.templates]
+
+
+def compile_insert_templates(insert_options, subtitle_configs):
+    """按勾选顺序编译插入字幕配置，所有错误一次性报告"""
+    # 同名配置以第一个为准，与原来的线性查找保持一致
+    configs_by_name = {}
+    for config in subtitle_configs:
+        configs_by_name.setdefault(config.get('name'), config)
+
+    templates = []
+    errors = []
+    for option in insert_options:
+        if option == NO_INSERT_OPTION:
+            continue
+        config = configs_by_name.get(option)
+        if config is None:
+            continue
+        try:
+            start = parse_time_ms(config.get('start_time'))
+            end = parse_time_ms(config.get('end_time'))
+            if end < start:
+                raise ValueError("结束时间不能早于开始时间")
+            text = validate_ass_text(config.get('ass_statement'))
+        except ValueError as e:
+            errors.append(f"{option}: {e}")
+            continue
+        templates.append(InsertTemplate(option, start, end, text))
+
+    if errors:
+        raise InsertConfigError("插入字幕配置无效:\n" + "\n".join(errors))
+    return InsertTemplates(templates)
+
+
+def _ass_color(value):
+    """把配置中的 'H00FFFFFF' 转为ASS使用的 '&H00FFFFFF'"""
+    return value if value.startswith('&') else f'&{value}'
+
+
+def _encode_output(text):
+    """按文本模式写文件的换行规则编码，保证与 subs.save() 的输出逐字节一致"""
+    return text.replace('\n', os.linesep).encode('utf-8')
+
+
+def make_style(fields):
+    """根据样式方案中的字段创建 SSAStyle，未知字段直接报错"""
+    import pysubs2
+    style = pysubs2.SSAStyle()
+    for key, value in fields.items():
+        if not hasattr(style, key):
+            raise ValueError(f"未知的样式字段: {key}")
+        if key in COLOR_FIELDS and isinstance(value, str):
+            value = _ass_color(value)
+        setattr(style, key, value)
+    return style
+
+
+class HeaderTemplate:
+    """预渲染的 [Script Info] 和 [V4+ Styles] 区块，每批次生成一次，所有工作线程共享（只读）"""
+
+    def __init__(self, info, styles):
+        self.info = tuple(info)
+        self.styles = tuple((name, style.copy()) for name, style in styles)
+        text = self._render_header()
+        self.text = text
+        self.data = _encode_output(text)
+
+    def _render_header(self):
+        import pysubs2
+        subs = pysubs2.SSAFile()
+        subs.info = dict(self.info)
+        subs.styles = {name: style.copy() for name, style in self.styles}
+        text = subs.to_string('ass')
+        return text[:text.index('\n' + EVENTS_SECTION + '\n') + 1]
+
+    def style(self, name):
+        """取得模板中样式的副本"""
+        for style_name, style in self.styles:
+            if style_name == name:
+                return style.copy()
+        return None
+
+    def apply_to(self, subs):
+        """为ASS源文件补全分辨率和样式，保留文件原有信息"""
+        for key in ('PlayResX', 'PlayResY'):
+            if not subs.info.get(key):
+                subs.info[key] = dict(self.info)[key]
+
+        default_style = self.style('Default')
+        if 'Default' in subs.styles:
+            # 保留原有样式，只更新颜色
+            subs.styles['Default'].primarycolor = default_style.primarycolor
+            subs.styles['Default'].outlinecolor = default_style.outlinecolor
+        else:
+            subs.styles['Default'] = default_style
+        # 样式方案中的其他样式只补充文件中不存在的
+        for name, style in self.styles:
+            if name not in subs.styles:
+                subs.styles[name] = style.copy()
+
+    def write(self, subs, path, events_text=None):
+        """写出使用本模板头部的ASS文件，只需渲染事件部分
+        events_text 为已渲染的 [Events] 区块，多个输出共用同一组事件时只渲染一次"""
+        if events_text is None:
+            events_text = render_events(subs.events)
+        with open(path, 'wb') as f:
+            f.write(self.data)
+            f.write(_encode_output(events_text))
+
+
+def render_events(events):
+    """只渲染 [Events] 区块"""
+    import pysubs2
+    events_only = pysubs2.SSAFile()
+    events_only.info = {}
+    events_only.styles = {}
+    events_only.events = events
+    text = events_only.to_string('ass')
+    return text[text.index('\n' + EVENTS_SECTION + '\n') + 1:]
+
+
+def _scale_style(style, scale):
+    """按分辨率比例缩放样式的字号、边框、阴影和边距"""
+    for field in SCALED_STYLE_FIELDS:
+        value = getattr(style, field) * scale
+        setattr(style, field, round(value) if field.startswith('margin') else value)
+
+
+def build_header_template(font_family, font_size, subtitle_color, outline_color,
+                          style_profile=None, play_res=DEFAULT_PLAY_RES):
+    """根据字体、颜色和样式方案生成批次共享的头部模板
+    分辨率不是 1080p 时，字号、边框和边距按高度等比缩放，画面上的大小保持不变"""
+    import pysubs2
+    info = list(DEFAULT_SCRIPT_INFO)
+    info.append(('PlayResX', str(play_res[0])))
+    info.append(('PlayResY', str(play_res[1])))
+
+    default_style = pysubs2.SSAStyle(
+        fontname=font_family,
+        fontsize=font_size,
+        primarycolor=_ass_color(subtitle_color),
+        outlinecolor=_ass_color(outline_color),
+        shadow=1.0
+    )
+    styles = {'Default': default_style}
+    for name, fields in (style_profile or {}).items():
+        try:
+            styles[name] = make_style(fields)
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"样式 {name} 无效: {e}")
+    scale = play_res[1] / DEFAULT_PLAY_RES[1]
+    if scale != 1:
+        for style in styles.values():
+            _scale_style(style, scale)
+    return HeaderTemplate(info, styles.items())
+
+
+class LRUCache:
+    """线程安全的LRU缓存，用于在批次和请求之间复用繁简转换结果"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# 进程内共享的转换资源：OpenCC词典只加载一次，HTTP连接池跨文件复用
+_resource_lock = threading.Lock()
+_opencc_lock = threading.Lock()  # 纯Python实现受GIL限制，加锁不影响吞吐但保证线程安全
+_opencc_converter = None
+_http_session = None
+t2s_cache = LRUCache(T2S_CACHE_SIZE)
+
+
+def get_opencc():
+    """取得共享的OpenCC转换器，首次调用时加载词典"""
+    global _opencc_converter
+    if _opencc_converter is None:
+        with _resource_lock:
+            if _opencc_converter is None:
+                import opencc
+                _opencc_converter = opencc.OpenCC('t2s')  # 繁体转简体
+    return _opencc_converter
+
+
+def get_http_session():
+    """取得共享的HTTP会话，保持与转换服务的连接"""
+    import requests
+    global _http_session
+    if _http_session is None:
+        with _resource_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+API_OUTCOME_OK = 'ok'
+API_OUTCOME_ERROR = 'error'
+API_OUTCOME_THROTTLED = 'throttled'
+
+
+class AdaptiveLimiter:
+    """按AIMD方式调整在线请求的并发上限，所有工作线程共用
+    延迟正常且并发已用满时每轮加一，遇到限流或响应超时时减半"""
+
+    def __init__(self, initial=API_CONCURRENCY_INITIAL, minimum=1, maximum=HTTP_POOL_SIZE,
+                 latency_target=API_LATENCY_TARGET):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.inflight = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latencies = deque(maxlen=API_LATENCY_SAMPLES)
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """等待空闲的并发名额"""
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+
+    def release(self, latency, outcome):
+        """归还名额并按本次请求的结果调整上限"""
+        with self._cond:
+            saturated = self.inflight >= int(self.limit)
+            self.inflight -= 1
+            self.requests += 1
+            if outcome == API_OUTCOME_THROTTLED:
+                self.throttled += 1
+                now = time.monotonic()
+                # 同时在途的请求往往一起失败，一个延迟周期内只减半一次
+                if now - self._last_decrease >= self.latency_target:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            elif outcome == API_OUTCOME_OK:
+                self.latencies.append(latency)
+                if saturated and latency <= self.latency_target:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                self.errors += 1
+            self._cond.notify_all()
+
+    def percentile(self, p):
+        """最近请求延迟的分位数（毫秒）"""
+        with self._cond:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return round(samples[index] * 1000, 1)
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                'limit': int(self.limit),
+                'inflight': self.inflight,
+                'requests': self.requests,
+                'errors': self.errors,
+                'throttled': self.throttled,
+            }
+        for p in (50, 90, 99):
+            stats[f'p{p}_ms'] = self.percentile(p)
+        return stats
+
+
+api_limiter = AdaptiveLimiter()
+
+
+def request_api_convert(text):
+    """向在线API发送一次转换请求，返回转换结果和是否成功的标志"""
+    import requests
+    url = ZHCONVERT_URL
+    headers = {
+        'accept': 'application/json, text/plain, */*',
+        'content-type': 'application/json',
+        'origin': 'http://zhconvert.org',
+        'referer': 'http://zhconvert.org/',
+        'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36'
+    }
+
+    data = {
+        'text': text,
+        'converter': 'China',
+        'modules': '{"ChineseVariant":"1"}',
+        'jpTextConversionStrategy': 'none',
+        'jpStyleConversionStrategy': 'none',  # 修复：使用字符串而不是布尔值
+        'diffEnable': False,
+        'outputFormat': 'json'
+    }
+
+    # 尝试多种网络配置
+    proxy_configs = [
+        None,  # 不使用代理
+        {'http': 'http://127.0.0.1:7890', 'https': 'http://127.0.0.1:7890'},  # 常见代理端口
+        {'http': 'http://127.0.0.1:1080', 'https': 'http://127.0.0.1:1080'},  # 另一个常见端口
+    ]
+
+    for proxies in proxy_configs:
+        api_limiter.acquire()
+        started = time.perf_counter()
+        outcome = API_OUTCOME_ERROR
+        try:
+            response = get_http_session().post(
+                url,
+                headers=headers,
+                json=data,
+                proxies=proxies,
+                timeout=(API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+            )
+
+            if response.status_code == 200:
+                result = response.json()
+                if result.get('code') == 0:
+                    outcome = API_OUTCOME_OK
+                    converted_text = result.get('data', {}).get('text', text)
+                    if converted_text and converted_text.strip():
+                        api_breaker.record_success()
+                        return converted_text, True  # 转换成功
+                    else:
+                        return text, False  # 如果转换结果为空，返回原文
+                else:
+                    continue  # 尝试下一个配置
+            elif response.status_code in API_THROTTLE_STATUS:
+                outcome = API_OUTCOME_THROTTLED  # 服务限流，降低并发
+                continue
+            else:
+                continue  # 尝试下一个配置
+
+        except requests.exceptions.ReadTimeout:
+            outcome = API_OUTCOME_THROTTLED  # 已连上但响应超时，多半是服务过载
+            continue
+        except requests.exceptions.RequestException:
+            continue  # 尝试下一个配置
+        except Exception:
+            continue  # 尝试下一个配置
+        finally:
+            api_limiter.release(time.perf_counter() - started, outcome)
+
+    # 如果所有方法都失败，返回原文本
+    api_breaker.record_failure()
+    return text, False  # 转换失败
+
+
+class CircuitBreaker:
+    """在线转换的熔断器，所有工作线程共用
+    连续失败达到阈值后断开，期间直接改用本地转换；
+    断开一段时间后放行一次试探请求，成功则恢复，失败则继续断开"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold=API_BREAKER_THRESHOLD, reset_timeout=API_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否可以发送在线请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                # 只放行这一个试探请求，试探没有结果时下个周期再放行
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("在线转换服务已恢复")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state == self.CLOSED:
+                    print(f"在线转换连续失败 {self.failures} 次，暂停 {self.reset_timeout} 秒，改用本地转换")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+
+api_breaker = CircuitBreaker()
+
+class _BatchItem:
+    """合并请求中的一段文本"""
+
+    __slots__ = ('text', 'result', 'done')
+
+    def __init__(self, text):
+        self.text = text
+        self.result = None
+        self.done = threading.Event()
+
+
+class ApiBatcher:
+    """把多个工作线程在短时间窗口内提交的在线转换文本合并成一次请求
+    窗口内第一个提交的线程负责发送，结果按分隔行拆回给各线程；
+    拆分后段数不符时各线程改为单独请求"""
+
+    def __init__(self, send, window=API_BATCH_WINDOW, max_chars=API_BATCH_MAX_CHARS):
+        self.send = send  # send(文本) -> (结果, 是否成功)
+        self.window = window
+        self.max_chars = max_chars
+        self.requests = 0  # 实际发出的合并请求数
+        self.texts = 0     # 提交的文本段数
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_chars = 0
+        self._full = threading.Event()
+
+    def convert(self, text):
+        item = _BatchItem(text)
+        with self._lock:
+            self._pending.append(item)
+            self._pending_chars += len(text)
+            self.texts += 1
+            leader = len(self._pending) == 1
+            if self._pending_chars >= self.max_chars:
+                self._full.set()
+        if leader:
+            # 等待窗口结束或文本量达到上限，期间其他线程提交的文本一起发送
+            self._full.wait(self.window)
+            with self._lock:
+                batch = self._pending
+                self._pending = []
+                self._pending_chars = 0
+                self._full.clear()
+            self._send_batch(batch)
+        item.done.wait()
+        if item.result is None:
+            return self.send(text)
+        return item.result
+
+    def _send_batch(self, batch):
+        try:
+            with self._lock:
+                self.requests += 1
+            if len(batch) == 1:
+                batch[0].result = self.send(batch[0].text)
+                return
+            converted, success = self.send(API_BATCH_SEPARATOR.join(item.text for item in batch))
+            if not success:
+                for item in batch:
+                    item.result = (item.text, False)
+                return
+            parts = converted.split(API_BATCH_SEPARATOR)
+            if len(parts) != len(batch):
+                return  # 分隔行被改动，由各线程单独请求
+            for item, part in zip(batch, parts):
+                item.result = (part, True) if part.strip() else (item.text, False)
+        except Exception:
+            pass  # 结果为空的由各线程单独请求
+        finally:
+            for item in batch:
+                item.done.set()
+
+
+api_batcher = ApiBatcher(request_api_convert)
+
+
+def api_stats():
+    """在线转换的运行统计：并发上限、延迟分位数、请求合并和熔断状态"""
+    stats = api_limiter.stats()
+    stats['batched_texts'] = api_batcher.texts
+    stats['batched_requests'] = api_batcher.requests
+    stats['breaker'] = api_breaker.state
+    return stats
+
+
+class ChinaConverter:
+    """繁体中国化转换 - 支持API优先设置"""
+
+    def __init__(self, api_priority=True):
+        self.api_priority = api_priority
+
+    def convert_to_china_text(self, text, notes=None):
+        """繁体中文转换，返回转换结果和是否成功的标志
+        notes 为列表时，记录改用备选方式等情况"""
+        if not text or not text.strip():
+            return text, False
+
+        cache_key = (self.api_priority, text)
+        cached = t2s_cache.get(cache_key)
+        if cached is not None:
+            return cached, True
+
+        result = self._convert_uncached(text, notes)
+        if result[1]:
+            t2s_cache.put(cache_key, result[0])
+        return result
+
+    def _convert_uncached(self, text, notes=None):
+        """按API优先设置依次尝试各转换方式"""
+        if self.api_priority:
+            # API优先：先尝试在线API，再尝试本地OpenCC
+            result = self._try_api_convert(text)
+            if result[1]:  # 如果API转换成功
+                return result
+            # API失败，尝试本地转换
+            result = self._try_opencc_convert(text)
+            fallback = '在线API失败，改用OpenCC'
+        else:
+            # OpenCC优先：先尝试本地OpenCC，再尝试在线API
+            result = self._try_opencc_convert(text)
+            if result[1]:  # 如果OpenCC转换成功
+                return result
+            # OpenCC失败，尝试API转换
+            result = self._try_api_convert(text)
+            fallback = 'OpenCC失败，改用在线API'
+        if notes is not None:
+            notes.append(fallback if result[1] else '在线API和OpenCC均失败，保持原文本')
+        return result
+
+    def _try_opencc_convert(self, text):
+        """尝试使用OpenCC本地转换"""
+        try:
+            converter = get_opencc()
+            with _opencc_lock:
+                converted = converter.convert(text)
+            return converted, True  # 转换成功
+        except ImportError:
+            return text, False  # OpenCC未安装
+        except Exception:
+            return text, False  # 转换失败
+
+    def _try_api_convert(self, text):
+        """尝试使用在线API转换，与其他文件的请求合并发送
+        在线转换连续失败而暂停期间直接返回失败，由调用方改用OpenCC"""
+        if not api_breaker.allow():
+            return text, False
+        return api_batcher.convert(text)
+
+    def convert_events(self, events, notes=None):
+        """转换所有事件文本，返回是否有转换失败
+        相同的片段只转换一次，结果按位置写回各事件；片段按条缓存，
+        同一批次（以及之后的批次）其他文件中相同的台词直接取缓存结果"""
+        failed = False
+        # 只转换标签之间含中文的片段，特效标签和绘图指令原样保留
+        segments = [split_ass_text(event.text) for event in events]
+        unique, positions = collect_unique_texts(
+            piece if convertible else None for parts in segments for piece, convertible in parts)
+        if not unique:
+            return failed
+
+        converted = [t2s_cache.get((self.api_priority, text)) for text in unique]
+        missing = [slot for slot, result in enumerate(converted) if result is None]
+        if missing:
+            # 合并缓存中没有的片段进行转换，整段文本不进缓存，只缓存各片段
+            converted_text, success = self._convert_uncached('\n'.join(unique[slot] for slot in missing), notes)
+            results = converted_text.split('\n') if success and converted_text else None
+            if results is None:
+                failed = True  # 未缓存的片段保持原文本，已缓存的照常写回
+            elif len(results) == len(missing):  # 确保转换后的文本数量匹配
+                for slot, result in zip(missing, results):
+                    converted[slot] = result
+                    t2s_cache.put((self.api_priority, unique[slot]), result)
+            else:
+                # 如果数量不匹配，逐个转换
+                if notes is not None:
+                    notes.append('合并转换后行数不一致，改为逐行转换')
+                for slot in missing:
+                    try:
+                        result, individual_success = self.convert_to_china_text(unique[slot], notes)
+                    except Exception:
+                        result, individual_success = unique[slot], False
+                    if not individual_success:
+                        failed = True
+                    converted[slot] = result
+
+        slots = iter(positions)
+        for event, parts in zip(events, segments):
+            pieces = []
+            changed = False
+            for piece, _ in parts:
+                slot = next(slots)
+                if slot is not None and converted[slot] and converted[slot] != piece:
+                    piece = converted[slot]
+                    changed = True
+                pieces.append(piece)
+            if changed:
+                event.text = ''.join(pieces)
+        return failed
+
+
+def split_ass_text(text):
+    """把ASS事件文本拆成 [(片段, 是否需要转换)]，各片段按顺序拼接即为原文
+    特效标签块、换行转义和 \\p1 到 \\p0 之间的绘图指令不转换，不含中文的片段也不转换"""
+    parts = []
+    if not text:
+        return parts
+    drawing = False
+    for piece in ASS_PROTECTED_PATTERN.split(text):
+        if not piece:
+            continue
+        if piece.startswith('{') and piece.endswith('}'):
+            # 同一标签块中可能多次设置 \\p，以最后一次为准
+            for match in DRAWING_MODE_PATTERN.finditer(piece):
+                drawing = int(match.group(1)) > 0
+            parts.append((piece, False))
+        elif ASS_PROTECTED_PATTERN.fullmatch(piece):
+            parts.append((piece, False))
+        else:
+            parts.append((piece, not drawing and CJK_PATTERN.search(piece) is not None))
+    return parts
+
+
+def collect_unique_texts(texts):
+    """收集需要转换的不重复文本
+    返回 (按首次出现排序的文本列表, 每个输入对应的列表下标)，空白文本的下标为 None"""
+    unique = []
+    slots = {}
+    positions = []
+    for text in texts:
+        if not text or not text.strip():
+            positions.append(None)
+            continue
+        slot = slots.get(text)
+        if slot is None:
+            slot = slots[text] = len(unique)
+            unique.append(text)
+        positions.append(slot)
+    return unique, positions
+
+
+class OutputVariant:
+    """输出矩阵中的一个变体：同一次解析额外写出的一个ASS文件（只读）"""
+
+    def __init__(self, name, header_template, convert_to_china):
+        self.name = name  # 加在输出文件名后的后缀
+        self.header_template = header_template
+        self.convert_to_china = convert_to_china
+
+    def output_path(self, ass_file):
+        """变体的输出路径，如 movie.ass -> movie.2160p.ass"""
+        stem, ext = os.path.splitext(ass_file)
+        return f"{stem}.{self.name}{ext}"
+
+
+class ConvertOptions:
+    """一个批次共享的转换选项，创建后只读"""
+
+    def __init__(self, insert_templates, header_template, delete_original=False,
+                 convert_to_china=False, api_priority=True, variants=(), formats=('ass',)):
+        self.insert_templates = insert_templates
+        self.header_template = header_template
+        self.delete_original = delete_original
+        self.convert_to_china = convert_to_china
+        self.api_priority = api_priority
+        self.china_converter = ChinaConverter(api_priority)
+        self.variants = tuple(variants)
+        self.formats = tuple(formats)
+
+    def output_paths(self, ass_file):
+        """每种输出格式的路径，顺序与 formats 一致"""
+        return [format_output_path(ass_file, format_) for format_ in self.formats]
+
+    def written_paths(self, ass_file):
+        """转换一个文件会写出的所有路径：各格式的输出和各输出变体，供输出规划检查重名"""
+        return self.output_paths(ass_file) + [variant.output_path(ass_file) for variant in self.variants]
+
+
+def format_output_path(ass_file, format_):
+    """ASS输出路径对应的其他格式路径，如 movie.ass -> movie.vtt"""
+    return os.path.splitext(ass_file)[0] + '.' + format_
+
+
+def preload_modules():
+    """预先导入转换用到的模块，供界面显示后在后台线程调用"""
+    import pysubs2
+    import requests
+    return pysubs2, requests
+
+
+_prewarm_lock = threading.Lock()
+_prewarmed = set()
+
+
+def prewarm(convert_to_china=False):
+    """预热转换资源：导入模块；需要繁体中国化时加载OpenCC词典并与转换服务完成TLS握手
+    可重复调用，已完成的步骤直接跳过，适合在用户选择文件时从后台线程调用"""
+    with _prewarm_lock:
+        if 'modules' not in _prewarmed:
+            preload_modules()
+            _prewarmed.add('modules')
+        if not convert_to_china:
+            return
+
+        if 'opencc' not in _prewarmed:
+            try:
+                get_opencc()
+            except ImportError:
+                pass  # 未安装OpenCC，转换时会改用在线API
+            _prewarmed.add('opencc')
+
+        if 'http' not in _prewarmed:
+            import requests
+            try:
+                # 建立的连接留在会话的连接池里，首次转换直接复用
+                get_http_session().head(ZHCONVERT_URL, timeout=5)
+                _prewarmed.add('http')
+            except requests.exceptions.RequestException:
+                pass  # 网络不可用时不标记，下次预热再试
+
+
+def load_subtitle(path):
+    """加载字幕文件"""
+    import pysubs2
+    if path.endswith('.srt'):
+        return pysubs2.load(path, encoding='utf-8')
+    elif path.endswith('.vtt'):
+        return pysubs2.load(path, encoding='utf-8', format='vtt')
+    elif path.endswith('.ass'):
+        return pysubs2.load(path, encoding='utf-8')
+    raise ValueError('Unsupported file format')
+
+
+def load_subtitle_text(text, format_=None):
+    """从字幕文本加载，返回字幕对象和是否为ASS源"""
+    import pysubs2
+    subs = pysubs2.SSAFile.from_string(text, format_=format_)
+    detected = format_ or getattr(subs, 'format', None)
+    return subs, detected in ('ass', 'ssa')
+
+
+def process_subs(subs, is_ass_source, options, notes=None):
+    """对已加载的字幕执行样式、繁体转换和插入，返回繁体转换是否失败"""
+    if is_ass_source:
+        # 对于ASS文件，保留原有信息，只补全分辨率和样式
+        options.header_template.apply_to(subs)
+
+    # 繁体转换，失败不影响整个转换过程
+    china_convert_failed = False
+    if options.convert_to_china:
+        try:
+            import sharding
+            if sharding.should_shard(subs.events):
+                # 超大文件的OpenCC转换按区间分给多个进程（API优先时在线转换失败才分片）
+                china_convert_failed = sharding.convert_large_events(
+                    subs.events, options.china_converter, notes)
+            else:
+                china_convert_failed = options.china_converter.convert_events(subs.events, notes)
+        except Exception as e:
+            china_convert_failed = True
+            if notes is not None:
+                notes.append(f"繁体转换出错: {e}")
+
+    # 插入自定义字幕（模板已在批次开始时编译校验）
+    subs.events.extend(options.insert_templates.make_events())
+    return china_convert_failed
+
+
+def render_ass(subs, is_ass_source, options):
+    """把处理后的字幕渲染为ASS文本，非ASS源复用预渲染的头部"""
+    if is_ass_source:
+        return subs.to_string('ass')
+    return options.header_template.text + render_events(subs.events)
+
+
+def render_output(subs, is_ass_source, options, format_='ass'):
+    """把处理后的字幕渲染为指定格式的文本
+    SRT和VTT由 pysubs2 从同一组事件生成：斜体等标签转为HTML标签，其他特效标签和绘图事件会被去掉"""
+    if format_ == 'ass':
+        return render_ass(subs, is_ass_source, options)
+    return subs.to_string(format_)
+
+
+def convert_file(srt_file, ass_file, options, report=None):
+    """转换单个文件，返回完成消息，失败时抛出异常
+    传入 FileReport 时记录各阶段耗时、字幕条数和文件大小"""
+    if report is None:
+        report = FileReport(srt_file, ass_file)
+    started = time.perf_counter()
+    report.bytes_in = os.path.getsize(srt_file)
+    subs = load_subtitle(srt_file)
+    report.cues = len(subs.events)
+    loaded = time.perf_counter()
+
+    is_ass_source = srt_file.endswith('.ass')
+    variants = VariantWriter(subs, is_ass_source, options) if options.variants else None
+    china_convert_failed = process_subs(subs, is_ass_source, options, report.fallbacks)
+    processed = time.perf_counter()
+
+    # 保存文件：所有格式共用同一组处理后的事件，非ASS源的ASS输出直接复用预渲染的头部
+    output_files = options.output_paths(ass_file)
+    for format_, path in zip(options.formats, output_files):
+        if format_ != 'ass':
+            subs.save(path, format_=format_)
+        elif is_ass_source:
+            subs.save(path)
+        else:
+            options.header_template.write(subs, path, variants.events_text(subs.events) if variants else None)
+    report.bytes_out = sum(os.path.getsize(path) for path in output_files)
+    if variants:
+        failed, written_files = variants.write(subs, ass_file, report.fallbacks)
+        china_convert_failed = china_convert_failed or failed
+        report.bytes_out += sum(os.path.getsize(path) for path in written_files)
+    written = time.perf_counter()
+
+    # 删除原文件（输出覆盖了原文件时保留）
+    if options.delete_original and path_key(srt_file) not in {path_key(path) for path in output_files}:
+        os.remove(srt_file)
+
+    report.load_ms = (loaded - started) * 1000
+    report.process_ms = (processed - loaded) * 1000
+    report.write_ms = (written - processed) * 1000
+    report.total_ms = (written - started) * 1000
+    report.china_convert_failed = bool(options.convert_to_china and china_convert_failed)
+
+    # 构建完成消息
+    status_msg = f"已保存到: {output_files[0]}"
+    if len(output_files) > 1:
+        status_msg += f" 等 {len(output_files)} 种格式"
+    if variants:
+        status_msg += f" 及 {len(options.variants)} 个变体"
+    if report.china_convert_failed:
+        status_msg += " (繁体转换失败，保持原文本)"
+    report.status = REPORT_STATUS_DONE
+    report.message = status_msg
+    return status_msg
+
+
+class VariantWriter:
+    """按输出矩阵写出变体，所有变体共用一次解析、一次插入和最多一次繁体转换
+    须在 process_subs 之前创建，以便保留繁体转换前的文本和ASS源原有的头部"""
+
+    def __init__(self, subs, is_ass_source, options):
+        self.options = options
+        self.is_ass_source = is_ass_source
+        self.source_count = len(subs.events)  # 插入字幕之前的事件数
+        self.original_texts = [event.text for event in subs.events]
+        if is_ass_source:
+            self.source_info = dict(subs.info)
+            self.source_styles = {name: style.copy() for name, style in subs.styles.items()}
+        self._rendered = {}
+        self._other_events = None  # 繁体转换设置与主输出不同的那组事件
+        self._other_failed = False
+
+    def events_text(self, events):
+        """渲染一组事件，同一组事件只渲染一次"""
+        key = id(events)
+        if key not in self._rendered:
+            self._rendered[key] = (events, render_events(events))
+        return self._rendered[key][1]
+
+    def _events_for(self, subs, convert_to_china, notes):
+        """取得变体需要的事件：与主输出的繁体转换设置相同时直接共用，否则另建一份文本不同的副本"""
+        if convert_to_china == self.options.convert_to_china:
+            return subs.events, False
+        if self._other_events is None:
+            copies = [event.copy() for event in subs.events[:self.source_count]]
+            if convert_to_china:
+                # 主输出没有做繁体转换，在副本上转换一次
+                self._other_failed = self.options.china_converter.convert_events(copies, notes)
+            else:
+                # 主输出已转换，副本恢复原文
+                for event, text in zip(copies, self.original_texts):
+                    event.text = text
+            self._other_events = copies + subs.events[self.source_count:]
+        return self._other_events, self._other_failed
+
+    def write(self, subs, ass_file, notes=None):
+        """写出所有变体，返回 (繁体转换是否失败, 写出的文件列表)"""
+        import pysubs2
+        failed = False
+        written = []
+        for variant in self.options.variants:
+            events, variant_failed = self._events_for(subs, variant.convert_to_china, notes)
+            failed = failed or variant_failed
+            path = variant.output_path(ass_file)
+            if self.is_ass_source:
+                # ASS源以文件原有的头部为基础补全，不继承主输出补入的样式
+                variant_subs = pysubs2.SSAFile()
+                variant_subs.info = dict(self.source_info)
+                variant_subs.styles = {name: style.copy() for name, style in self.source_styles.items()}
+                variant.header_template.apply_to(variant_subs)
+                variant_subs.events = events
+                variant_subs.save(path)
+            else:
+                variant.header_template.write(subs, path, self.events_text(events))
+            written.append(path)
+        return failed, written
+
+
+def read_source(source, encoding='utf-8-sig'):
+    """把 str、bytes 或文件对象统一读取为文本"""
+    if hasattr(source, 'read'):
+        source = source.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = bytes(source).decode(encoding)
+    if not isinstance(source, str):
+        raise TypeError(f"不支持的字幕来源类型: {type(source).__name__}")
+    return source
+
+
+def convert_subtitle_text(source, options, format_=None, output_format='ass'):
+    """在内存中转换字幕，返回输出文本（默认为ASS）和繁体转换是否失败"""
+    subs, is_ass_source = load_subtitle_text(read_source(source), format_)
+    china_convert_failed = process_subs(subs, is_ass_source, options)
+    text = render_output(subs, is_ass_source, options, output_format)
+    return text, bool(options.convert_to_china and china_convert_failed)
+
+
+def convert_text(source, options, format_=None, output_format='ass'):
+    """转换内存中的字幕（str、bytes 或文件对象），返回输出文本，不读写磁盘"""
+    return convert_subtitle_text(source, options, format_, output_format)[0]
+
+
+def convert_stream(source, destination, options, format_=None, output_format='ass'):
+    """转换字幕并写入流，文本流写入str，二进制流写入UTF-8字节，返回繁体转换是否失败"""
+    ass_text, china_convert_failed = convert_subtitle_text(source, options, format_, output_format)
+    if isinstance(destination, io.TextIOBase):
+        destination.write(ass_text)
+    else:
+        destination.write(ass_text.encode('utf-8'))
+    return china_convert_failed
+
+
+def is_subtitle_file(path):
+    """是否为支持的字幕文件（忽略隐藏的临时文件）"""
+    name = os.path.basename(path)
+    return not name.startswith('.') and name.lower().endswith(SUBTITLE_EXTENSIONS)
+
+
+def iter_subtitle_files(directory):
+    """递归列出目录下的字幕文件，跳过隐藏目录，不跟随目录的符号链接"""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        files, subdirectories = [], []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                        elif entry.is_file() and is_subtitle_file(entry.name):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"扫描目录失败 {current}: {e}")
+            continue
+        yield from sorted(files)
+        # 倒序入栈，子目录按名称顺序依次处理
+        stack.extend(sorted(subdirectories, reverse=True))
+
+
+def output_path_for(srt_file, output_directory):
+    """计算输出文件路径，未设置输出目录时保存在原文件目录"""
+    filename = os.path.splitext(os.path.basename(srt_file))[0] + '.ass'
+    return os.path.join(output_directory or os.path.dirname(srt_file), filename)
+
+
+def path_key(path):
+    """比较路径用的键：绝对路径，Windows 下不区分大小写"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class OutputPlan:
+    """一批文件的输出规划，转换开始前确定，保证并发的转换不会写同一个文件"""
+
+    def __init__(self):
+        self.jobs = []     # (源文件, 输出文件)，按添加顺序
+        self.renamed = []  # (源文件, 输出文件)，因重名而改了输出路径
+        self.skipped = []  # (源文件, 原因)
+        self.mirror_root = None  # 保留目录结构时使用的根目录，转换中途加入的文件沿用
+
+    def directories(self):
+        """所有输出文件所在的目录"""
+        return sorted({os.path.dirname(ass_file) for _, ass_file in self.jobs})
+
+    def create_directories(self):
+        """一次性创建所有输出目录，工作线程不再各自创建"""
+        for directory in self.directories():
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+
+def _single_output(ass_file):
+    return [ass_file]
+
+
+def _output_free(srt_file, ass_file, taken, written_paths):
+    """该输出写出的所有文件都未被占用（ASS源的主输出可以覆盖自身）"""
+    own = path_key(srt_file)
+    for path in written_paths(ass_file):
+        key = path_key(path)
+        if key in taken and not (key == own and path == ass_file):
+            return False
+    return True
+
+
+def _unique_output(srt_file, ass_file, taken, written_paths):
+    """在文件名后加序号，直到写出的所有文件都不与已占用的路径重复"""
+    if _output_free(srt_file, ass_file, taken, written_paths):
+        return ass_file
+    stem, ext = os.path.splitext(ass_file)
+    number = 2
+    while not _output_free(srt_file, f"{stem}_{number}{ext}", taken, written_paths):
+        number += 1
+    return f"{stem}_{number}{ext}"
+
+
+def _mirror_output(srt_file, group, output_directory):
+    """按重名文件的公共上级目录，把输出放到对应的子目录中"""
+    try:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in group])
+    except ValueError:
+        return None  # 不在同一个盘符
+    relative = os.path.relpath(os.path.dirname(os.path.abspath(srt_file)), root)
+    if relative == '.':
+        return None  # 同目录下仅扩展名不同，无法靠目录区分
+    return output_path_for(srt_file, os.path.join(output_directory, relative))
+
+
+def _common_root(directories):
+    """目录的公共上级目录，跨盘符时返回 None"""
+    try:
+        return os.path.commonpath(directories)
+    except ValueError:
+        return None
+
+
+def _is_within(directory, root):
+    """目录是否在 root 之下（含 root 本身）"""
+    return _common_root([directory, root]) == root
+
+
+def _mirror_directories(sources, output_directory, root=None):
+    """源文件目录 -> 输出目录，在输出目录下重建相对于公共上级目录的结构，返回 (映射, 根目录)
+    root 为沿用的根目录，不在其下的目录按它们自己的公共上级目录计算"""
+    source_dirs = sorted({os.path.dirname(os.path.abspath(f)) for f in sources})
+    outside = source_dirs if root is None else [d for d in source_dirs if not _is_within(d, root)]
+    outside_root = _common_root(outside) if outside else None
+    if root is None:
+        root = outside_root
+    mapping = {}
+    for directory in source_dirs:
+        base = root if directory not in outside else outside_root
+        if base is not None:
+            relative = os.path.relpath(directory, base)
+        else:
+            # 跨盘符时以盘符作为第一级目录
+            drive, rest = os.path.splitdrive(directory)
+            relative = os.path.join(drive.strip(':\\/').replace(':', ''), rest.lstrip('\\/'))
+        mapping[directory] = os.path.normpath(os.path.join(output_directory, relative))
+    return mapping, root
+
+
+def plan_outputs(files, output_directory, collision=OUTPUT_COLLISION_SUFFIX, layout=OUTPUT_LAYOUT_FLAT,
+                 reserved=(), mirror_root=None, written_paths=_single_output):
+    """确定每个源文件的输出路径
+    layout 为 mirror 时在输出目录下重建源文件的目录结构（以本批次源文件的公共上级目录为根）；
+    多个源文件输出到同一路径、或输出会覆盖本批次的某个源文件时，按 collision 处理；
+    重名的一组按源文件路径排序后处理，结果与添加顺序无关；
+    reserved 为已被占用的路径（如正在进行的批次的源文件和输出），同样视为重名；
+    mirror_root 为沿用的目录结构根目录（取自正在进行的批次的 plan.mirror_root）；
+    written_paths(输出文件) 返回一个文件实际写出的所有路径（如 ConvertOptions.written_paths），
+    其中任何一个与其他文件的输出、本批次的源文件或 reserved 重复都按重名处理"""
+    if collision not in OUTPUT_COLLISION_SCHEMES:
+        raise ValueError(f"未知的重名处理方式: {collision}")
+    if layout not in OUTPUT_LAYOUTS:
+        raise ValueError(f"未知的输出目录结构: {layout}")
+
+    sources = []
+    source_keys = set()
+    for srt_file in files:
+        key = path_key(srt_file)
+        if key not in source_keys:
+            source_keys.add(key)
+            sources.append(srt_file)
+
+    plan = OutputPlan()
+    if layout == OUTPUT_LAYOUT_MIRROR and output_directory:
+        directories, plan.mirror_root = _mirror_directories(sources, output_directory, mirror_root)
+
+        def target(srt_file):
+            return output_path_for(srt_file, directories[os.path.dirname(os.path.abspath(srt_file))])
+    else:
+        def target(srt_file):
+            return output_path_for(srt_file, output_directory)
+
+    groups = OrderedDict()
+    for srt_file in sources:
+        groups.setdefault(path_key(target(srt_file)), []).append(srt_file)
+
+    # 输出不能覆盖本批次的其他源文件（ASS源输出到自身路径时原样覆盖）
+    reserved = {path_key(path) for path in reserved}
+    taken = source_keys | reserved
+
+    def take(ass_file):
+        taken.update(path_key(path) for path in written_paths(ass_file))
+
+    # 统计每个路径会被哪些输出组写出，跨组重名（如变体与另一个文件的主输出同名）的组也按重名处理
+    claims = {}
+    for key, group in groups.items():
+        for path in written_paths(target(group[0])):
+            claims.setdefault(path_key(path), set()).add(key)
+
+    resolved = {}
+    conflicts = []
+    for key, group in groups.items():
+        ass_file = target(group[0])
+        shared = any(len(claims[path_key(path)]) > 1 for path in written_paths(ass_file))
+        if len(group) == 1 and not shared and _output_free(group[0], ass_file, taken, written_paths):
+            resolved[group[0]] = ass_file
+            take(ass_file)
+        else:
+            conflicts.append((key, sorted(group, key=path_key)))
+    conflicts.sort(key=lambda conflict: conflict[0])  # 跨组重名时按路径决定谁保留原名，与添加顺序无关
+
+    mirror = collision == OUTPUT_COLLISION_MIRROR and output_directory
+    for key, group in conflicts:
+        # 保留原输出名的文件：输出即自身的ASS源，否则是排序后的第一个
+        ass_file = target(group[0])
+        keeper = next((f for f in group if path_key(f) == key), group[0])
+        if not _output_free(keeper, ass_file, taken, written_paths):
+            keeper = None
+        for srt_file in group:
+            mirrored = _mirror_output(srt_file, group, output_directory) if mirror else None
+            if srt_file is keeper and mirrored is None:
+                resolved[srt_file] = ass_file
+                take(ass_file)
+                continue
+            if collision == OUTPUT_COLLISION_SKIP:
+                plan.skipped.append((srt_file, f"输出文件重名: {ass_file}"))
+                continue
+            renamed = _unique_output(srt_file, mirrored or ass_file, taken, written_paths)
+            take(renamed)
+            resolved[srt_file] = renamed
+            plan.renamed.append((srt_file, renamed))
+
+    plan.jobs = [(srt_file, resolved[srt_file]) for srt_file in sources if srt_file in resolved]
+    return plan
+
+
+def estimate_job_cost(srt_file):
+    """估计一个文件的转换耗时，读取、繁体转换和写入都与文件大小大致成正比"""
+    try:
+        return os.path.getsize(srt_file)
+    except OSError:
+        return 0
+
+
+def order_jobs(jobs):
+    """短作业优先：按估计耗时从小到大排列，大文件不再拖住后面的小文件；耗时相同时保持原顺序"""
+    return sorted(jobs, key=lambda job: estimate_job_cost(job[0]))
+
+
+REPORT_STATUS_DONE = 'done'
+REPORT_STATUS_FAILED = 'failed'
+REPORT_STATUS_SKIPPED = 'skipped'
+
+
+class FileReport:
+    """单个文件的转换记录"""
+
+    FIELDS = ('source', 'output', 'status', 'message', 'cues', 'bytes_in', 'bytes_out',
+              'load_ms', 'process_ms', 'write_ms', 'total_ms', 'china_convert_failed', 'fallbacks')
+
+    def __init__(self, source, output=''):
+        self.source = source
+        self.output = output
+        self.status = ''
+        self.message = ''
+        self.cues = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.load_ms = 0.0
+        self.process_ms = 0.0
+        self.write_ms = 0.0
+        self.total_ms = 0.0
+        self.china_convert_failed = False
+        self.fallbacks = []  # 改用备选方式或失败的原因
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        for field in ('load_ms', 'process_ms', 'write_ms', 'total_ms'):
+            data[field] = round(data[field], 1)
+        # 同一原因在逐行转换时可能出现很多次，只保留一次
+        data['fallbacks'] = list(OrderedDict.fromkeys(self.fallbacks))
+        return data
+
+
+class BatchReport:
+    """一个批次的转换报告，批次结束时写成 JSON 和 CSV"""
+
+    def __init__(self, output_directory='', stats=None):
+        self.output_directory = output_directory
+        self.stats = stats or api_stats  # 在线转换统计的来源，在子进程中转换时由子进程提供
+        self.started_at = time.time()
+        self.finished_at = None
+        self.files = []
+        self._lock = threading.Lock()
+
+    def add(self, report):
+        with self._lock:
+            self.files.append(report)
+
+    def skip(self, source, reason):
+        """记录规划阶段被跳过的文件"""
+        report = FileReport(source)
+        report.status = REPORT_STATUS_SKIPPED
+        report.message = reason
+        self.add(report)
+
+    def summary(self):
+        with self._lock:
+            files = list(self.files)
+        counts = {REPORT_STATUS_DONE: 0, REPORT_STATUS_FAILED: 0, REPORT_STATUS_SKIPPED: 0}
+        for report in files:
+            counts[report.status] = counts.get(report.status, 0) + 1
+        finished_at = self.finished_at or time.time()
+        return {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'elapsed_s': round(finished_at - self.started_at, 2),
+            'output_directory': self.output_directory,
+            'total': len(files),
+            'done': counts[REPORT_STATUS_DONE],
+            'failed': counts[REPORT_STATUS_FAILED],
+            'skipped': counts[REPORT_STATUS_SKIPPED],
+            'china_convert_failed': sum(1 for r in files if r.china_convert_failed),
+            'bytes_in': sum(r.bytes_in for r in files),
+            'bytes_out': sum(r.bytes_out for r in files),
+            'online_api': self.stats(),
+        }
+
+    def to_dict(self):
+        with self._lock:
+            files = [report.to_dict() for report in self.files]
+        return {'summary': self.summary(), 'files': files}
+
+    def write(self, directory=None):
+        """写出 JSON 和 CSV 报告，返回 JSON 文件路径"""
+        if self.finished_at is None:
+            self.finished_at = time.time()
+        directory = directory or self.output_directory or '.'
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        base = os.path.join(directory, f'srt2ass_report_{stamp}')
+        data = self.to_dict()
+
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        # utf-8-sig 让 Excel 正确识别中文
+        with open(base + '.csv', 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FileReport.FIELDS)
+            writer.writeheader()
+            for row in data['files']:
+                row = dict(row, fallbacks='; '.join(row['fallbacks']))
+                writer.writerow(row)
+        return base + '.json'
+
+
+def load_batch_report(path):
+    """读取 JSON 批次报告"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_app_settings(config_file=CONFIG_FILE, settings_file=SETTINGS_FILE):
+    """读取界面保存的配置文件，供无界面模式使用"""
+    settings = {
+        'subtitle_configs': [],
+        'subtitle_color': 'H00FFFFFF',
+        'outline_color': 'H00000000',
+        'output_directory': '',
+        'font_family': DEFAULT_FONT_FAMILY,
+        'font_size': DEFAULT_FONT_SIZE,
+        'style_profiles': {},
+        'style_profile': '',
+        'output_collision': OUTPUT_COLLISION_SUFFIX,
+        'output_layout': OUTPUT_LAYOUT_FLAT,
+        'output_variants': [],
+        'output_formats': ['ass'],
+    }
+    for path in (config_file, settings_file):
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    settings.update(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"读取配置失败 {path}: {e}")
+    return settings
+
+
+def build_convert_options(settings, insert_options=(), delete_original=False,
+                          convert_to_china=False, api_priority=True):
+    """根据配置生成批次转换选项，配置无效时抛出 ValueError"""
+    insert_templates = compile_insert_templates(insert_options, settings['subtitle_configs'])
+    header_template = build_header_template(
+        settings['font_family'], settings['font_size'],
+        settings['subtitle_color'], settings['outline_color'],
+        settings['style_profiles'].get(settings['style_profile'])
+    )
+    variants = build_output_variants(settings, convert_to_china)
+    formats = build_output_formats(settings)
+    return ConvertOptions(insert_templates, header_template, delete_original,
+                          convert_to_china, api_priority, variants, formats)
+
+
+def build_output_formats(settings):
+    """根据配置中的 output_formats 生成输出格式列表（去重并保持顺序），配置无效时抛出 ValueError"""
+    formats = []
+    for format_ in settings.get('output_formats') or ('ass',):
+        format_ = str(format_).lower().lstrip('.')
+        if format_ not in OUTPUT_FORMATS:
+            raise ValueError(f"不支持的输出格式: {format_}")
+        if format_ not in formats:
+            formats.append(format_)
+    return formats
+
+
+def build_output_variants(settings, convert_to_china=False):
+    """根据配置中的 output_variants 生成输出矩阵，配置无效时抛出 ValueError
+    每项为 {"name": 文件名后缀, "style_profile": 样式方案, "play_res": [宽, 高], "convert_to_china": 是否繁体中国化}，
+    除 name 外省略的字段沿用批次设置"""
+    variants = []
+    names = set()
+    for spec in settings.get('output_variants') or ():
+        name = str(spec.get('name', '')).strip()
+        if not name or name in names or INVALID_FILENAME_CHARS & set(name):
+            raise ValueError(f"输出变体名称无效或重复: {name!r}")
+        names.add(name)
+
+        profile = spec.get('style_profile', settings['style_profile'])
+        if profile and profile not in settings['style_profiles']:
+            raise ValueError(f"输出变体 {name} 的样式方案不存在: {profile}")
+        try:
+            play_res = tuple(int(value) for value in spec.get('play_res', DEFAULT_PLAY_RES))
+        except (TypeError, ValueError):
+            play_res = ()
+        if len(play_res) != 2 or min(play_res) <= 0:
+            raise ValueError(f"输出变体 {name} 的分辨率无效: {spec.get('play_res')}")
+
+        header_template = build_header_template(
+            settings['font_family'], settings['font_size'],
+            settings['subtitle_color'], settings['outline_color'],
+            settings['style_profiles'].get(profile), play_res
+        )
+        variants.append(OutputVariant(name, header_template,
+                                      bool(spec.get('convert_to_china', convert_to_china))))
+    return variants
+
+
+def main(argv=None):
+    """管道模式：从文件或标准输入读取字幕，把ASS（或 --to 指定的格式）写到文件或标准输出"""
+    import argparse
+    parser = argparse.ArgumentParser(description='字幕转换（管道模式），不经过临时文件')
+    parser.add_argument('input', nargs='?', default='-', help='输入文件，- 表示标准输入')
+    parser.add_argument('-o', '--output', default='-', help='输出文件，- 表示标准输出')
+    parser.add_argument('-f', '--format', choices=['srt', 'vtt', 'ass'],
+                        help='输入格式，默认自动识别')
+    parser.add_argument('-t', '--to', choices=OUTPUT_FORMATS, default='ass', help='输出格式，默认为ASS')
+    parser.add_argument('--insert', action='append', default=[], metavar='NAME',
+                        help='插入的字幕配置名称，可重复')
+    parser.add_argument('--style-profile', help='使用的样式方案')
+    parser.add_argument('--china', action='store_true', help='繁体中国化')
+    parser.add_argument('--opencc-first', action='store_true', help='优先使用本地OpenCC而不是在线API')
+    args = parser.parse_args(argv)
+
+    settings = load_app_settings()
+    if args.style_profile is not None:
+        settings['style_profile'] = args.style_profile
+    try:
+        options = build_convert_options(settings, args.insert, False, args.china, not args.opencc_first)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    format_ = args.format
+    if format_ is None and args.input != '-':
+        format_ = os.path.splitext(args.input)[1].lower().lstrip('.') or None
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    try:
+        if args.output == '-':
+            failed = convert_stream(source, sys.stdout.buffer, options, format_, args.to)
+            sys.stdout.buffer.flush()
+        else:
+            with open(args.output, 'wb') as destination:
+                failed = convert_stream(source, destination, options, format_, args.to)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+
+    if failed:
+        print("繁体转换失败，保持原文本", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
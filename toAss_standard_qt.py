@@ -8,16 +8,29 @@ SRT 转 ASS 字幕转换器 - 标准PyQt5版本
 import sys
 import os
 import json
-import pysubs2
-import requests
+import threading
+import multiprocessing
+import time
+import startup_profile
+from notifications import NotificationAggregator
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QListWidget, QListWidgetItem, QCheckBox, QLabel, QPushButton,
                              QDialog, QFormLayout, QLineEdit, QTimeEdit, QTextEdit, QDialogButtonBox,
                              QFileDialog, QColorDialog, QAbstractItemView, QSystemTrayIcon, QMenu, QMessageBox,
                              QFontDialog, QTabWidget, QFrame, QScrollArea, QSizePolicy, QSpacerItem, QStackedWidget,
-                             QGraphicsOpacityEffect)
+                             QGraphicsOpacityEffect, QComboBox)
 from PyQt5.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal, QObject, QTime, QTimer
 from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPainter, QBrush, QPen
+startup_profile.mark('导入 PyQt5')
+# 只导入轻量的转换入口，pysubs2/requests/opencc 在界面显示后再加载
+from subtitle_engine import (OUTPUT_COLLISION_SCHEMES, OUTPUT_COLLISION_SUFFIX, OUTPUT_FORMATS, OUTPUT_LAYOUTS,
+                             OUTPUT_LAYOUT_FLAT, REPORT_STATUS_FAILED, JOB_PRIORITY_BATCH,
+                             JOB_PRIORITY_INTERACTIVE, BatchReport, FileReport, build_convert_options,
+                             convert_file, order_jobs, path_key, plan_outputs, prewarm)
+from conversion_process import (ConversionProcessUnavailable, PROCESS_RETRY_INTERVAL,
+                                start_conversion_process)
+from file_list_model import (FileListView, DirectoryScanner, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED,
+                             STATUS_SKIPPED)
 
 CONFIG_FILE = 'sub.json'
 SETTINGS_FILE = 'settings.json'
@@ -366,16 +379,23 @@ class FloatingInfoBar(QFrame):
         self.fade_timer.timeout.connect(update_fade)
         self.fade_timer.start(40)  # 稍快的退出动画
 
-class DragDropListWidget(QListWidget):
+    def closeEvent(self, event):
+        """关闭时停止所有定时器，被新提示条替换后不再执行动画回调"""
+        for name in ('timer', 'animation_timer', 'fade_timer'):
+            timer = getattr(self, name, None)
+            if timer is not None:
+                timer.stop()
+        super().closeEvent(event)
+
+class DragDropListWidget(FileListView):
     """支持拖拽的文件列表组件"""
-    files_dropped = pyqtSignal(list)
 
     def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAcceptDrops(True)
+        super().__init__("拖拽 SRT、VTT 或 ASS 文件到此处，或点击'添加文件'按钮", parent)
         self.setMinimumHeight(200)
+        # 普通和拖拽中两种状态的样式一次设置好，拖拽时只切换 dragActive 属性
         self.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 2px dashed #808080;
                 border-radius: 8px;
                 background-color: #3A3A3A;
@@ -383,134 +403,30 @@ class DragDropListWidget(QListWidget):
                 font-size: 13px;
                 color: #FFFFFF;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 10px;
                 margin: 3px;
                 border-radius: 5px;
                 background-color: #4A4A4A;
-                color: #FFFFFF;
                 border: 1px solid #606060;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #0078D4;
                 border: 1px solid #106EBE;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #505050;
                 border: 1px solid #707070;
             }
-        """)
-
-    def dragEnterEvent(self, event):
-        """拖拽进入事件"""
-        if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            valid_files = []
-            for url in urls:
-                file_path = url.toLocalFile()
-                if file_path.lower().endswith(('.srt', '.vtt', '.ass')):
-                    valid_files.append(file_path)
-
-            if valid_files:
-                event.acceptProposedAction()
-                self.setStyleSheet("""
-                    QListWidget {
-                        border: 2px solid #00D4FF;
-                        border-radius: 8px;
-                        background-color: #2A4A5A;
-                        padding: 12px;
-                        font-size: 13px;
-                        color: #FFFFFF;
-                    }
-                    QListWidget::item {
-                        padding: 10px;
-                        margin: 3px;
-                        border-radius: 5px;
-                        background-color: #4A6A7A;
-                        color: #FFFFFF;
-                        border: 1px solid #00D4FF;
-                    }
-                    QListWidget::item:selected {
-                        background-color: #0078D4;
-                        border: 1px solid #106EBE;
-                    }
-                    QListWidget::item:hover {
-                        background-color: #5A7A8A;
-                        border: 1px solid #00E4FF;
-                    }
-                """)
-            else:
-                event.ignore()
-        else:
-            event.ignore()
-
-    def dragMoveEvent(self, event):
-        """拖拽移动事件"""
-        if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            valid_files = []
-            for url in urls:
-                file_path = url.toLocalFile()
-                if file_path.lower().endswith(('.srt', '.vtt', '.ass')):
-                    valid_files.append(file_path)
-
-            if valid_files:
-                event.acceptProposedAction()
-            else:
-                event.ignore()
-        else:
-            event.ignore()
-
-    def dragLeaveEvent(self, event):
-        """拖拽离开事件"""
-        self.setStyleSheet("""
-            QListWidget {
-                border: 2px dashed #808080;
-                border-radius: 8px;
-                background-color: #3A3A3A;
-                padding: 12px;
-                font-size: 13px;
-                color: #FFFFFF;
-            }
-            QListWidget::item {
-                padding: 10px;
-                margin: 3px;
-                border-radius: 5px;
-                background-color: #4A4A4A;
-                color: #FFFFFF;
-                border: 1px solid #606060;
+            QListView[dragActive="true"] {
+                border: 2px solid #00D4FF;
+                background-color: #2A4A5A;
             }
-            QListWidget::item:selected {
-                background-color: #0078D4;
-                border: 1px solid #106EBE;
-            }
-            QListWidget::item:hover {
-                background-color: #505050;
-                border: 1px solid #707070;
+            QListView[dragActive="true"]::item {
+                background-color: #4A6A7A;
+                border: 1px solid #00D4FF;
             }
         """)
-        event.accept()
-
-    def dropEvent(self, event):
-        """拖拽放下事件"""
-        if event.mimeData().hasUrls():
-            files = []
-            urls = event.mimeData().urls()
-
-            for url in urls:
-                file_path = url.toLocalFile()
-                if file_path.lower().endswith(('.srt', '.vtt', '.ass')):
-                    files.append(file_path)
-
-            if files:
-                self.files_dropped.emit(files)
-                event.acceptProposedAction()
-            else:
-                event.ignore()
-        else:
-            event.ignore()
-
-        self.dragLeaveEvent(event)
 
 class CheckableListWidget(QListWidget):
     """可选择的列表组件"""
@@ -709,6 +625,8 @@ class CustomSideTabWidget(QWidget):
 class MainInterface(QScrollArea):
     """主界面 - 文件转换"""
     convert_requested = pyqtSignal(list, list, str, str, bool, bool)
+    files_added = pyqtSignal(list)  # 用户拖入或选择的文件，转换进行中时会优先转换
+    prewarm_requested = pyqtSignal(bool)  # 需要预热转换资源，参数为是否繁体中国化
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -718,6 +636,8 @@ class MainInterface(QScrollArea):
         self.outline_color = 'H00000000'
         self.delete_original_after_convert = False
         self.convert_to_china = False
+        self.api_priority = True  # 与复选框默认状态一致
+        self.scanners = []  # 正在扫描的文件夹
         self.output_directory = ""
         self.info_bars = []  # 存储信息提示条
 
@@ -777,13 +697,7 @@ class MainInterface(QScrollArea):
         self.file_list.setMinimumHeight(100)  # 紧凑的最小高度
         self.file_list.setMaximumHeight(160)  # 合理的最大高度限制
         self.file_list.files_dropped.connect(self.handle_dropped_files)
-
-        # 添加占位符文本
-        if self.file_list.count() == 0:
-            placeholder_item = QListWidgetItem("拖拽 SRT、VTT 或 ASS 文件到此处，或点击'添加文件'按钮")
-            placeholder_item.setFlags(Qt.NoItemFlags)
-            placeholder_item.setTextAlignment(Qt.AlignCenter)
-            self.file_list.addItem(placeholder_item)
+        self.file_list.directories_dropped.connect(self.scan_dropped_directories)
 
         file_layout.addWidget(self.file_list)
 
@@ -1093,26 +1007,45 @@ class MainInterface(QScrollArea):
     def handle_dropped_files(self, files):
         """处理拖拽的文件"""
         if files:
-            # 如果有占位符，先清除
-            if self.file_list.count() == 1:
-                first_item = self.file_list.item(0)
-                if first_item and first_item.flags() == Qt.NoItemFlags:
-                    self.file_list.clear()
-
             # 添加文件，避免重复
-            existing_files = [self.file_list.item(i).text()
-                            for i in range(self.file_list.count())]
+            added_count = self.file_list.add_files(files)
+            self.files_added.emit(files)
 
-            added_count = 0
-            for file in files:
-                if file not in existing_files:
-                    self.file_list.addItem(file)
-                    added_count += 1
+            self.prewarm_in_background()
 
             # 显示成功信息
             if added_count > 0:
                 self.show_info_bar("文件添加成功", f"已添加 {added_count} 个文件", "success")
 
+    def scan_dropped_directories(self, directories):
+        """在后台递归扫描拖入的文件夹，找到的字幕分批加入列表"""
+        scanner = DirectoryScanner(directories, self)
+        scanner.batch_found.connect(self.on_scan_batch)
+        scanner.finished.connect(self.on_scan_finished)
+        self.scanners.append(scanner)
+        scanner.start()
+        self.show_info_bar("正在扫描文件夹", "正在后台扫描拖入的文件夹...", "info")
+
+    def on_scan_batch(self, files):
+        """把扫描到的一批文件加入列表"""
+        scanner = self.sender()
+        added_count = self.file_list.add_files(files)
+        self.files_added.emit(files)
+        if scanner is not None:
+            scanner.added_count += added_count
+
+    def on_scan_finished(self, _):
+        """文件夹扫描完成"""
+        scanner = self.sender()
+        if scanner in self.scanners:
+            self.scanners.remove(scanner)
+        added_count = scanner.added_count if scanner is not None else 0
+        if added_count > 0:
+            self.show_info_bar("文件添加成功", f"已从文件夹添加 {added_count} 个文件", "success")
+            self.prewarm_in_background()
+        else:
+            self.show_info_bar("没有找到文件", "文件夹中没有新的 SRT、VTT 或 ASS 文件", "warning")
+
     def add_files(self):
         """添加文件"""
         try:
@@ -1127,39 +1060,26 @@ class MainInterface(QScrollArea):
             if not files:
                 return
 
-            # 如果有占位符，先清除
-            if self.file_list.count() == 1:
-                first_item = self.file_list.item(0)
-                if first_item and first_item.flags() == Qt.NoItemFlags:
-                    self.file_list.clear()
-
             # 添加选择的文件
-            for file in files:
-                existing_files = [self.file_list.item(i).text()
-                                for i in range(self.file_list.count())]
-                if file not in existing_files:
-                    self.file_list.addItem(file)
+            added_count = self.file_list.add_files(files)
+            self.files_added.emit(files)
+
+            self.prewarm_in_background()
 
             # 显示成功信息
-            if files:
-                self.show_info_bar("文件添加成功", f"已添加 {len(files)} 个文件", "success")
+            if added_count > 0:
+                self.show_info_bar("文件添加成功", f"已添加 {added_count} 个文件", "success")
 
         except Exception as e:
             self.show_info_bar("添加文件失败", f"错误: {str(e)}", "error")
 
     def remove_selected_files(self):
         """删除选中文件"""
-        for item in self.file_list.selectedItems():
-            self.file_list.takeItem(self.file_list.row(item))
+        self.file_list.remove_selected()
 
     def clear_all_files(self):
         """清除所有文件"""
-        self.file_list.clear()
-        # 重新添加占位符
-        placeholder_item = QListWidgetItem("拖拽 SRT、VTT 或 ASS 文件到此处，或点击'添加文件'按钮")
-        placeholder_item.setFlags(Qt.NoItemFlags)
-        placeholder_item.setTextAlignment(Qt.AlignCenter)
-        self.file_list.addItem(placeholder_item)
+        self.file_list.clear_files()
 
 
 
@@ -1170,6 +1090,12 @@ class MainInterface(QScrollArea):
     def on_convert_to_china_changed(self, state):
         """繁体中国化选项改变"""
         self.convert_to_china = state == Qt.Checked
+        if self.convert_to_china:
+            self.prewarm_in_background()
+
+    def prewarm_in_background(self):
+        """预热转换资源，点击开始转换时可以立即输出（由主窗口交给转换子进程）"""
+        self.prewarm_requested.emit(self.convert_to_china)
 
     def on_api_priority_changed(self, state):
         """API优先选项改变"""
@@ -1177,12 +1103,7 @@ class MainInterface(QScrollArea):
 
     def start_convert(self):
         """开始转换"""
-        # 获取有效的文件列表（排除占位符）
-        files = []
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            if item and item.flags() != Qt.NoItemFlags:
-                files.append(item.text())
+        files = self.file_list.file_paths()
 
         if len(files) == 0:
             self.show_info_bar("警告", "请先添加要转换的文件", "warning")
@@ -1320,8 +1241,63 @@ class SettingsInterface(QScrollArea):
 
         output_layout.addLayout(output_dir_layout)
 
+        # 输出目录结构
+        layout_layout = QHBoxLayout()
+        layout_label = ModernLabel("目录结构:")
+        layout_layout.addWidget(layout_label)
+
+        self.layout_combo = QComboBox()
+        self.layout_combo.setStyleSheet("""
+            QComboBox {
+                background-color: #4A4A4A;
+                color: #FFFFFF;
+                border: 1px solid #606060;
+                border-radius: 4px;
+                padding: 4px 8px;
+                font-size: 13px;
+            }
+        """)
+        for layout, text in OUTPUT_LAYOUTS.items():
+            self.layout_combo.addItem(text, layout)
+        self.layout_combo.currentIndexChanged.connect(self.on_layout_changed)
+        layout_layout.addWidget(self.layout_combo)
+        layout_layout.addStretch()
+
+        output_layout.addLayout(layout_layout)
+
+        # 输出重名处理
+        collision_layout = QHBoxLayout()
+        collision_label = ModernLabel("重名处理:")
+        collision_layout.addWidget(collision_label)
+
+        self.collision_combo = QComboBox()
+        self.collision_combo.setStyleSheet(self.layout_combo.styleSheet())
+        for scheme, text in OUTPUT_COLLISION_SCHEMES.items():
+            self.collision_combo.addItem(text, scheme)
+        self.collision_combo.currentIndexChanged.connect(self.on_collision_changed)
+        collision_layout.addWidget(self.collision_combo)
+        collision_layout.addStretch()
+
+        output_layout.addLayout(collision_layout)
+
+        # 输出格式，可多选，所有格式共用一次解析和转换
+        formats_layout = QHBoxLayout()
+        formats_label = ModernLabel("输出格式:")
+        formats_layout.addWidget(formats_label)
+
+        self.format_checkboxes = {}
+        for format_ in OUTPUT_FORMATS:
+            checkbox = QCheckBox(format_.upper())
+            checkbox.setStyleSheet("color: #FFFFFF; font-size: 13px;")
+            checkbox.stateChanged.connect(self.on_formats_changed)
+            formats_layout.addWidget(checkbox)
+            self.format_checkboxes[format_] = checkbox
+        formats_layout.addStretch()
+
+        output_layout.addLayout(formats_layout)
+
         # 输出目录说明
-        output_info = ModernLabel("• 未设置时：文件保存在原文件相同目录\n• 已设置时：所有文件统一保存到指定目录")
+        output_info = ModernLabel("• 未设置时：文件保存在原文件相同目录\n• 已设置时：所有文件统一保存到指定目录\n• 保留原目录结构时：按源文件的相对路径建立子目录\n• 多个文件输出重名时：按“重名处理”加序号、按原目录分开或跳过\n• 选择多种输出格式时：SRT、VTT 与ASS同名，只有扩展名不同")
         output_info.setStyleSheet("color: #A0A0A0; font-size: 12px;")
         output_layout.addWidget(output_info)
 
@@ -1460,6 +1436,7 @@ class SettingsInterface(QScrollArea):
 
         # 初始化显示
         self.update_output_dir_display()
+        self.update_output_options_display()
         self.update_font_display()
 
     def choose_output_directory(self):
@@ -1481,6 +1458,45 @@ class SettingsInterface(QScrollArea):
         self.update_output_dir_display()
         self.parent.main_interface.show_info_bar("设置清除", "已清除输出目录设置，将使用原文件目录", "success")
 
+    def on_layout_changed(self, index):
+        """输出目录结构改变"""
+        layout = self.layout_combo.itemData(index)
+        if layout and layout != self.parent.output_layout:
+            self.parent.output_layout = layout
+            self.parent.save_settings()
+
+    def on_collision_changed(self, index):
+        """重名处理方式改变"""
+        scheme = self.collision_combo.itemData(index)
+        if scheme and scheme != self.parent.output_collision:
+            self.parent.output_collision = scheme
+            self.parent.save_settings()
+
+    def on_formats_changed(self, state):
+        """输出格式改变，至少保留一种"""
+        formats = [format_ for format_, checkbox in self.format_checkboxes.items() if checkbox.isChecked()]
+        if not formats:
+            self.update_output_options_display()
+            return
+        if formats != self.parent.output_formats:
+            self.parent.output_formats = formats
+            self.parent.save_settings()
+
+    def update_output_options_display(self):
+        """更新目录结构和重名处理方式显示"""
+        index = self.layout_combo.findData(self.parent.output_layout)
+        self.layout_combo.blockSignals(True)
+        self.layout_combo.setCurrentIndex(max(index, 0))
+        self.layout_combo.blockSignals(False)
+        index = self.collision_combo.findData(self.parent.output_collision)
+        self.collision_combo.blockSignals(True)
+        self.collision_combo.setCurrentIndex(max(index, 0))
+        self.collision_combo.blockSignals(False)
+        for format_, checkbox in self.format_checkboxes.items():
+            checkbox.blockSignals(True)
+            checkbox.setChecked(format_ in self.parent.output_formats)
+            checkbox.blockSignals(False)
+
     def update_output_dir_display(self):
         """更新输出目录显示"""
         output_dir = self.parent.main_interface.output_directory
@@ -1629,250 +1645,48 @@ class WorkerSignals(QObject):
     """工作线程信号"""
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    status = pyqtSignal(str, str, object, str)  # 源文件, 状态, 耗时(秒), 消息
+
+class WatchSignals(QObject):
+    """监视文件夹转换结果信号（源文件, 是否成功, 消息）"""
+    converted = pyqtSignal(str, bool, str)
 
 class ConvertWorker(QRunnable):
     """转换工作线程"""
-    def __init__(self, srt_file, ass_file, insert_options, subtitle_configs,
-                 subtitle_color, outline_color, delete_original, convert_to_china,
-                 font_family, font_size, api_priority=True):
+    def __init__(self, srt_file, ass_file, options, process=None):
         super().__init__()
         self.srt_file, self.ass_file = srt_file, ass_file
-        self.insert_options, self.subtitle_configs = insert_options, subtitle_configs
-        self.subtitle_color = f'&{subtitle_color}'
-        self.outline_color = f'&{outline_color}'
-        self.delete_original = delete_original
-        self.convert_to_china = convert_to_china
-        self.font_family = font_family
-        self.font_size = font_size
-        self.api_priority = api_priority
+        self.options = options  # 批次共享的转换选项
+        self.process = process  # 转换子进程，为 None 时在本线程转换
+        self.report = FileReport(srt_file, ass_file)
         self.signals = WorkerSignals()
-        self.china_convert_failed = False  # 跟踪繁体转换状态
-
-    def convert_to_china_text(self, text, api_priority=True):
-        """繁体中文转换 - 支持API优先设置"""
-        if not text or not text.strip():
-            return text, False  # 返回转换结果和是否成功的标志
-
-        # 根据API优先设置决定转换顺序
-        if api_priority:
-            # API优先：先尝试在线API，再尝试本地OpenCC
-            result = self._try_api_convert(text)
-            if result[1]:  # 如果API转换成功
-                return result
-            # API失败，尝试本地转换
-            return self._try_opencc_convert(text)
-        else:
-            # OpenCC优先：先尝试本地OpenCC，再尝试在线API
-            result = self._try_opencc_convert(text)
-            if result[1]:  # 如果OpenCC转换成功
-                return result
-            # OpenCC失败，尝试API转换
-            return self._try_api_convert(text)
-
-    def _try_opencc_convert(self, text):
-        """尝试使用OpenCC本地转换"""
-        try:
-            import opencc
-            converter = opencc.OpenCC('t2s')  # 繁体转简体
-            converted = converter.convert(text)
-            return converted, True  # 转换成功
-        except ImportError:
-            return text, False  # OpenCC未安装
-        except Exception:
-            return text, False  # 转换失败
-
-    def _try_api_convert(self, text):
-        """尝试使用在线API转换"""
-        # 使用在线API转换
-        url = 'https://api.zhconvert.org/convert'
-        headers = {
-            'accept': 'application/json, text/plain, */*',
-            'content-type': 'application/json',
-            'origin': 'http://zhconvert.org',
-            'referer': 'http://zhconvert.org/',
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36'
-        }
-
-        data = {
-            'text': text,
-            'converter': 'China',
-            'modules': '{"ChineseVariant":"1"}',
-            'jpTextConversionStrategy': 'none',
-            'jpStyleConversionStrategy': 'none',  # 修复：使用字符串而不是布尔值
-            'diffEnable': False,
-            'outputFormat': 'json'
-        }
-
-        # 尝试多种网络配置
-        proxy_configs = [
-            None,  # 不使用代理
-            {'http': 'http://127.0.0.1:7890', 'https': 'http://127.0.0.1:7890'},  # 常见代理端口
-            {'http': 'http://127.0.0.1:1080', 'https': 'http://127.0.0.1:1080'},  # 另一个常见端口
-        ]
-
-        for proxies in proxy_configs:
-            try:
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    json=data,
-                    proxies=proxies,
-                    timeout=10  # 减少超时时间
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get('code') == 0:
-                        converted_text = result.get('data', {}).get('text', text)
-                        if converted_text and converted_text.strip():
-                            return converted_text, True  # 转换成功
-                        else:
-                            return text, False  # 如果转换结果为空，返回原文
-                    else:
-                        continue  # 尝试下一个配置
-                else:
-                    continue  # 尝试下一个配置
-
-            except requests.exceptions.RequestException:
-                continue  # 尝试下一个配置
-            except Exception:
-                continue  # 尝试下一个配置
-
-        # 如果所有方法都失败，返回原文本
-        return text, False  # 转换失败
 
     def run(self):
+        started = time.perf_counter()
         try:
-            # 加载字幕文件
-            if self.srt_file.endswith('.srt'):
-                subs = pysubs2.load(self.srt_file, encoding='utf-8')
-            elif self.srt_file.endswith('.vtt'):
-                subs = pysubs2.load(self.srt_file, encoding='utf-8', format='vtt')
-            elif self.srt_file.endswith('.ass'):
-                subs = pysubs2.load(self.srt_file, encoding='utf-8')
-            else:
-                raise ValueError('Unsupported file format')
-
-            # 设置样式信息
-            if not self.srt_file.endswith('.ass'):
-                subs.info = {
-                    'Title': 'Default Aegisub file',
-                    'ScriptType': 'v4.00+',
-                    'WrapStyle': '0',
-                    'ScaledBorderAndShadow': 'yes',
-                    'YCbCr Matrix': 'TV.601',
-                    'PlayResX': '1920',
-                    'PlayResY': '1080'
-                }
-
-                subs.styles['Default'] = pysubs2.SSAStyle(
-                    fontname=self.font_family,
-                    fontsize=self.font_size,
-                    primarycolor=self.subtitle_color,
-                    outlinecolor=self.outline_color,
-                    shadow=1.0
-                )
-            else:
-                if 'PlayResX' not in subs.info or not subs.info['PlayResX']:
-                    subs.info['PlayResX'] = '1920'
-                if 'PlayResY' not in subs.info or not subs.info['PlayResY']:
-                    subs.info['PlayResY'] = '1080'
-
-                if 'Default' in subs.styles:
-                    default_style = subs.styles['Default']
-                    default_style.primarycolor = self.subtitle_color
-                    default_style.outlinecolor = self.outline_color
-                else:
-                    subs.styles['Default'] = pysubs2.SSAStyle(
-                        fontname=self.font_family,
-                        fontsize=self.font_size,
-                        primarycolor=self.subtitle_color,
-                        outlinecolor=self.outline_color,
-                        shadow=1.0
-                    )
-
-            # 繁体转换
-            if self.convert_to_china:
-                try:
-                    # 收集所有文本
-                    all_texts = []
-                    for event in subs.events:
-                        if event.text and event.text.strip():
-                            all_texts.append(event.text)
-                        else:
-                            all_texts.append("")  # 保持空文本的位置
-
-                    if all_texts:
-                        # 合并文本进行转换
-                        combined_text = '\n'.join(all_texts)
-                        converted_text, success = self.convert_to_china_text(combined_text, self.api_priority)
-
-                        if success and converted_text:
-                            converted_texts = converted_text.split('\n')
-
-                            # 确保转换后的文本数量匹配
-                            if len(converted_texts) == len(all_texts):
-                                for event, text in zip(subs.events, converted_texts):
-                                    event.text = text if text else event.text
-                            else:
-                                # 如果数量不匹配，逐个转换
-                                for event in subs.events:
-                                    if event.text and event.text.strip():
-                                        try:
-                                            converted, individual_success = self.convert_to_china_text(event.text, self.api_priority)
-                                            if individual_success:
-                                                event.text = converted
-                                            else:
-                                                self.china_convert_failed = True
-                                        except:
-                                            self.china_convert_failed = True
-                        else:
-                            self.china_convert_failed = True
-
-                except Exception as e:
-                    # 繁体转换失败，但不影响整个转换过程
-                    self.china_convert_failed = True
-                    pass
-
-            # 插入自定义字幕
-            for insert_option in self.insert_options:
-                if insert_option != '不插入字幕':
-                    config = next((c for c in self.subtitle_configs if c['name'] == insert_option), None)
-                    if config:
-                        start = pysubs2.make_time(
-                            int(config['start_time'][:2]),
-                            int(config['start_time'][3:5]),
-                            int(config['start_time'][6:8]),
-                            int(config['start_time'][9:12])
-                        )
-                        end = pysubs2.make_time(
-                            int(config['end_time'][:2]),
-                            int(config['end_time'][3:5]),
-                            int(config['end_time'][6:8]),
-                            int(config['end_time'][9:12])
-                        )
-                        subs.events.append(pysubs2.SSAEvent(
-                            start=start,
-                            end=end,
-                            text=config['ass_statement']
-                        ))
-
-            # 保存文件
-            subs.save(self.ass_file)
-
-            # 删除原文件
-            if self.delete_original:
-                os.remove(self.srt_file)
-
-            # 构建完成消息
-            status_msg = f"已保存到: {self.ass_file}"
-            if self.convert_to_china and self.china_convert_failed:
-                status_msg += " (繁体转换失败，保持原文本)"
+            status_msg = self.convert()
+            self.signals.status.emit(self.srt_file, STATUS_DONE, time.perf_counter() - started, status_msg)
             self.signals.finished.emit(status_msg)
-
         except Exception as e:
+            self.report.status = REPORT_STATUS_FAILED
+            self.report.message = str(e)
+            self.report.total_ms = (time.perf_counter() - started) * 1000
+            self.signals.status.emit(self.srt_file, STATUS_FAILED, time.perf_counter() - started, str(e))
             self.signals.error.emit(str(e))
 
+    def convert(self):
+        """优先交给转换子进程，本线程只等待结果；子进程不可用时在本线程转换"""
+        def on_started():
+            self.signals.status.emit(self.srt_file, STATUS_RUNNING, None, '')
+
+        if self.process is not None:
+            try:
+                return self.process.convert(self.srt_file, self.ass_file, self.options, self.report, on_started)
+            except ConversionProcessUnavailable:
+                pass
+        on_started()
+        return convert_file(self.srt_file, self.ass_file, self.options, self.report)
+
 class SrtToAssConverter(QMainWindow):
     """主窗口"""
     def __init__(self):
@@ -1887,6 +1701,31 @@ class SrtToAssConverter(QMainWindow):
         # 初始化字体设置
         self.font_family = "方正粗圆_GBK"
         self.font_size = 70
+        # 样式方案：{方案名: {样式名: 样式字段}}，在Default之外追加命名样式
+        self.style_profiles = {}
+        self.style_profile = ''
+        self.output_collision = OUTPUT_COLLISION_SUFFIX  # 输出重名时的处理方式
+        self.output_layout = OUTPUT_LAYOUT_FLAT  # 输出目录结构
+        # 输出矩阵：每个文件额外写出的变体（样式方案、分辨率、繁体转换），只能在设置文件中配置
+        self.output_variants = []
+        self.output_formats = ['ass']  # 输出格式
+        # 监视文件夹服务，由托盘菜单启动
+        self.watch_service = None
+        self.watch_signals = WatchSignals()
+        # 批次转换报告
+        self.batch_report = None
+        self.last_report_path = None
+        # 正在进行的批次的转换选项和已占用的路径，转换中添加的文件据此规划输出
+        self.batch_options = None
+        self.batch_reserved = set()
+        self.batch_mirror_root = None  # 本批次保留目录结构时的根目录，中途加入的文件沿用
+        # 转换子进程，界面显示后由预加载启动，批次之间保持运行
+        self.conversion_process = None
+        self.conversion_process_retry_at = 0.0  # 在此时间之前不再尝试启动子进程
+        self.batch_process = None
+        # 工作线程的通知按时间窗口合并成一条汇总显示
+        self.notifier = NotificationAggregator(self.show_notification, parent=self)
+        self.watch_signals.converted.connect(self.on_watch_converted)
         self.initUI()
         self.load_settings()
         self.init_tray()
@@ -1937,6 +1776,8 @@ class SrtToAssConverter(QMainWindow):
 
         # 连接转换信号
         self.main_interface.convert_requested.connect(self.start_conversion)
+        self.main_interface.files_added.connect(self.add_interactive_files)
+        self.main_interface.prewarm_requested.connect(self.prewarm_conversion)
         self.settings_interface.config_changed.connect(self.on_config_changed)
 
         # 连接页面切换信号
@@ -1950,11 +1791,22 @@ class SrtToAssConverter(QMainWindow):
         """页面切换时的处理"""
         if index == 1:  # 设置页面
             self.settings_interface.update_output_dir_display()
+            self.settings_interface.update_output_options_display()
             self.settings_interface.update_font_display()
 
     def start_conversion(self, files, insert_options, subtitle_color, outline_color, delete_original, convert_to_china):
         """开始转换处理"""
         try:
+            # 每批次编译一次插入字幕模板和头部模板，配置有误时直接终止而不是逐个文件报错
+            try:
+                options = build_convert_options(
+                    self.current_settings(subtitle_color, outline_color), insert_options,
+                    delete_original, convert_to_china, self.main_interface.api_priority
+                )
+            except ValueError as e:
+                self.main_interface.show_info_bar("配置错误", str(e), "error")
+                return
+
             # 检查输出目录设置
             if not self.main_interface.output_directory:
                 output_dir = QFileDialog.getExistingDirectory(
@@ -1970,55 +1822,144 @@ class SrtToAssConverter(QMainWindow):
                     self.settings_interface.update_output_dir_display()
                 self.main_interface.show_info_bar("目录已设置", f"输出目录已设置为: {output_dir}", "success")
 
-            self.total_conversions = len(files)
+            # 转换开始前统一确定输出路径，重名的文件按设置处理，输出目录一次性创建
+            plan = plan_outputs(files, self.main_interface.output_directory,
+                                self.output_collision, self.output_layout,
+                                written_paths=options.written_paths)
+            plan.create_directories()
+
+            file_list = self.main_interface.file_list
+            file_list.set_all_status(STATUS_QUEUED)
+            self.batch_process = self.get_conversion_process()
+            stats = self.batch_process.api_stats if self.batch_process is not None else None
+            self.batch_report = BatchReport(self.main_interface.output_directory, stats)
+            for file_path, reason in plan.skipped:
+                file_list.set_status(file_path, STATUS_SKIPPED, None, reason)
+                self.batch_report.skip(file_path, reason)
+
+            if not plan.jobs:
+                self.main_interface.show_info_bar("没有可转换的文件", "所有文件都因输出重名被跳过", "warning")
+                return
+
+            self.total_conversions = len(plan.jobs)
+            self.notifier.reset()
             self.conversion_count = 0
 
             # 记录输出信息
             self.main_interface.output_directory_used = self.main_interface.output_directory
             self.main_interface.output_files = []
 
-            for file_path in files:
-                filename = os.path.splitext(os.path.basename(file_path))[0] + '.ass'
-                ass_file = os.path.join(self.main_interface.output_directory, filename)
-                self.main_interface.output_files.append(ass_file)
-
-                worker = ConvertWorker(
-                    file_path, ass_file, insert_options, self.subtitle_configs,
-                    subtitle_color, outline_color, delete_original, convert_to_china,
-                    self.font_family, self.font_size, self.main_interface.api_priority
-                )
-
-                worker.signals.finished.connect(self.on_conversion_finished)
-                worker.signals.error.connect(self.on_conversion_error)
-                self.threadpool.start(worker)
+            self.batch_options = options
+            self.batch_reserved = {path_key(path) for path in files}
+            self.batch_mirror_root = plan.mirror_root
+            # 短作业优先，小文件不必等排在前面的大文件
+            for file_path, ass_file in order_jobs(plan.jobs):
+                self.start_worker(file_path, ass_file, JOB_PRIORITY_BATCH)
 
             # 禁用转换按钮
             self.main_interface.convert_button.setEnabled(False)
             self.main_interface.convert_button.setText("转换中...")
 
             # 显示开始转换信息
-            self.main_interface.show_info_bar("开始转换", f"正在转换 {len(files)} 个文件...", "info")
+            self.main_interface.show_info_bar("开始转换", self.describe_plan(plan), "info")
 
         except Exception as e:
             self.main_interface.show_info_bar("转换失败", f"转换启动失败: {str(e)}", "error")
 
+    def get_conversion_process(self):
+        """取得转换子进程，未启动或已退出时重新启动；无法启动时返回 None，改在线程池中转换
+
+        两次启动至少间隔 PROCESS_RETRY_INTERVAL 秒，子进程起不来或反复退出时不会每次都重启
+        """
+        if self.conversion_process is not None and not self.conversion_process.is_available():
+            self.conversion_process = None
+        now = time.monotonic()
+        if self.conversion_process is None and now >= self.conversion_process_retry_at:
+            self.conversion_process_retry_at = now + PROCESS_RETRY_INTERVAL
+            self.conversion_process = start_conversion_process()
+        return self.conversion_process
+
+    def start_worker(self, file_path, ass_file, priority):
+        """创建转换任务并放入线程池，优先级高的先执行"""
+        # 记录输出文件
+        self.main_interface.output_files.append(ass_file)
+        self.batch_reserved.update(path_key(path) for path in self.batch_options.written_paths(ass_file))
+
+        worker = ConvertWorker(file_path, ass_file, self.batch_options, self.batch_process)
+        self.batch_report.add(worker.report)
+
+        worker.signals.finished.connect(self.on_conversion_finished)
+        worker.signals.error.connect(self.on_conversion_error)
+        worker.signals.status.connect(self.main_interface.file_list.set_status)
+        self.threadpool.start(worker, priority)
+
+    def add_interactive_files(self, files):
+        """转换进行中添加的文件加入当前批次，排在尚未开始的文件前面"""
+        if self.batch_report is None or self.conversion_count >= self.total_conversions:
+            return  # 没有正在进行的转换，等用户开始下一批
+        files = [path for path in files if path_key(path) not in self.batch_reserved]
+        if not files:
+            return
+        try:
+            plan = plan_outputs(files, self.main_interface.output_directory_used,
+                                self.output_collision, self.output_layout, self.batch_reserved,
+                                self.batch_mirror_root, self.batch_options.written_paths)
+            plan.create_directories()
+        except (ValueError, OSError) as e:
+            print(f"无法加入正在进行的转换: {e}")
+            return
+
+        file_list = self.main_interface.file_list
+        for file_path, reason in plan.skipped:
+            file_list.set_status(file_path, STATUS_SKIPPED, None, reason)
+            self.batch_report.skip(file_path, reason)
+        self.batch_reserved.update(path_key(path) for path in files)
+        self.total_conversions += len(plan.jobs)
+        for file_path, ass_file in order_jobs(plan.jobs):
+            file_list.set_status(file_path, STATUS_QUEUED)
+            self.start_worker(file_path, ass_file, JOB_PRIORITY_INTERACTIVE)
+
+        if plan.jobs:
+            # 扫描文件夹时会分批加入，提示合并显示
+            self.notifier.add("优先转换", f"已将 {len(plan.jobs)} 个新添加的文件插到队列最前面", "info")
+
+    @staticmethod
+    def describe_plan(plan):
+        """开始转换时的提示文字"""
+        content = f"正在转换 {len(plan.jobs)} 个文件..."
+        if plan.renamed:
+            content += f" {len(plan.renamed)} 个重名文件已改名"
+        if plan.skipped:
+            content += f" {len(plan.skipped)} 个重名文件已跳过"
+        return content
+
     def on_conversion_finished(self, _):
         """转换完成处理"""
         self.conversion_count += 1
-
         if self.conversion_count == self.total_conversions:
-            # 所有文件转换完成
-            self.main_interface.convert_button.setEnabled(True)
-            self.main_interface.convert_button.setText("开始转换")
-
-            # 显示转换完成消息
-            content = f"所有文件已转换完成！保存在: {self.main_interface.output_directory_used}"
-            self.main_interface.show_info_bar("转换完成", content, "success")
-
-            # 清空文件列表
-            self.main_interface.clear_all_files()
-
-            # 显示输出位置信息
+            self.finish_batch()
+
+    def finish_batch(self):
+        """批次中最后一个文件结束时统一收尾，与最后结束的文件成功还是失败无关"""
+        failed = self.batch_report.summary()['failed'] if self.batch_report is not None else 0
+        self.write_batch_report()
+        self.main_interface.convert_button.setEnabled(True)
+        self.main_interface.convert_button.setText("开始转换")
+
+        # 显示转换完成消息，失败数以批次报告为准
+        content = f"所有文件已转换完成！保存在: {self.main_interface.output_directory_used}"
+        if failed:
+            content += f"（其中 {failed} 个失败，详见转换报告）"
+        self.notifier.reset()
+        self.main_interface.show_info_bar("转换完成", content, "warning" if failed else "success")
+
+        # 清空文件列表
+        self.main_interface.clear_all_files()
+
+        # 有失败时直接打开报告查看失败原因，否则显示输出位置信息
+        if failed:
+            self.show_batch_report()
+        else:
             self.show_output_location_info()
 
     def show_output_location_info(self):
@@ -2050,6 +1991,7 @@ class SrtToAssConverter(QMainWindow):
 
             open_folder_btn = msg_box.addButton("打开文件夹", QMessageBox.ActionRole)
             show_list_btn = msg_box.addButton("显示文件列表", QMessageBox.ActionRole)
+            report_btn = msg_box.addButton("查看报告", QMessageBox.ActionRole)
             msg_box.addButton("取消", QMessageBox.RejectRole)
             msg_box.setDefaultButton(open_folder_btn)
 
@@ -2059,6 +2001,8 @@ class SrtToAssConverter(QMainWindow):
                 self.open_folder(output_dir)
             elif msg_box.clickedButton() == show_list_btn:
                 self.show_output_files_list()
+            elif msg_box.clickedButton() == report_btn:
+                self.show_batch_report()
 
         except Exception as e:
             print(f"无法显示输出位置信息: {e}")
@@ -2099,14 +2043,43 @@ class SrtToAssConverter(QMainWindow):
         except Exception as e:
             print(f"无法显示文件列表: {e}")
 
+    def write_batch_report(self):
+        """批次结束时写出 JSON 和 CSV 转换报告"""
+        if self.batch_report is None:
+            return
+        try:
+            self.last_report_path = self.batch_report.write()
+            print(f"转换报告已保存: {self.last_report_path}")
+        except OSError as e:
+            print(f"写入转换报告失败: {e}")
+        self.batch_report = None
+        # 批次结束，子进程不再需要这一批的转换选项
+        if self.batch_process is not None:
+            self.batch_process.forget_options(self.batch_options)
+            self.batch_process = None
+
+    def show_batch_report(self):
+        """查看最近一次的转换报告"""
+        if not self.last_report_path or not os.path.exists(self.last_report_path):
+            self.main_interface.show_info_bar("转换报告", "还没有转换报告", "info")
+            return
+        from report_view import BatchReportDialog
+        try:
+            BatchReportDialog(self.last_report_path, self).exec_()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"无法打开转换报告: {e}")
+
+    def show_notification(self, title, content, bar_type):
+        """显示合并后的通知，提示条会替换上一条"""
+        self.main_interface.show_info_bar(title, content, bar_type)
+
     def on_conversion_error(self, error_msg):
         """转换错误处理"""
         self.conversion_count += 1
-        self.main_interface.show_info_bar("转换错误", f"转换失败: {error_msg}", "error")
+        self.notifier.add("转换错误", f"转换失败: {error_msg}", "error")
 
         if self.conversion_count == self.total_conversions:
-            self.main_interface.convert_button.setEnabled(True)
-            self.main_interface.convert_button.setText("开始转换")
+            self.finish_batch()
 
     def on_config_changed(self):
         """配置改变处理"""
@@ -2126,6 +2099,11 @@ class SrtToAssConverter(QMainWindow):
 
         self.tray_menu = QMenu()
         show_action = self.tray_menu.addAction('显示主窗口')
+        self.watch_action = self.tray_menu.addAction('监视文件夹')
+        self.watch_action.setCheckable(True)
+        self.watch_action.toggled.connect(self.toggle_watch_folder)
+        report_action = self.tray_menu.addAction('查看转换报告')
+        report_action.triggered.connect(self.show_batch_report)
         quit_action = self.tray_menu.addAction('退出程序')
 
         show_action.triggered.connect(self.show_main_window)
@@ -2135,6 +2113,75 @@ class SrtToAssConverter(QMainWindow):
         self.tray_icon.setContextMenu(self.tray_menu)
         self.tray_icon.show()
 
+    def toggle_watch_folder(self, checked):
+        """开始或停止监视文件夹"""
+        if not checked:
+            self.stop_watch_folder()
+            return
+        if self.watch_service:
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "选择要监视的文件夹", os.path.expanduser("~"))
+        if not directory:
+            self.watch_action.setChecked(False)
+            return
+
+        # 使用主界面当前的转换选项
+        try:
+            options = build_convert_options(
+                self.current_settings(), self.main_interface.insert_options.getCheckedItems(),
+                self.main_interface.delete_original_after_convert,
+                self.main_interface.convert_to_china, self.main_interface.api_priority
+            )
+        except ValueError as e:
+            self.tray_icon.showMessage('配置错误', str(e), QSystemTrayIcon.Warning, 3000)
+            self.watch_action.setChecked(False)
+            return
+
+        from watch_folder import WatchService
+        self.watch_service = WatchService(
+            [directory], self.main_interface.output_directory, options,
+            max_workers=max(1, self.threadpool.maxThreadCount() // 2),
+            on_result=self.watch_signals.converted.emit, collision=self.output_collision,
+            process=self.get_conversion_process()
+        )
+        self.watch_service.start()
+        self.tray_icon.showMessage('监视文件夹', f'正在监视: {directory}', QSystemTrayIcon.Information, 2000)
+
+    def preload_in_background(self):
+        """界面显示后启动转换子进程，由它预加载转换模块；无法启动时在本进程的后台线程预加载"""
+        self.prewarm_conversion(False, start=True)
+
+    def prewarm_conversion(self, convert_to_china, start=False):
+        """在转换子进程中预热转换资源，子进程不可用时在本进程的后台线程预热
+
+        拖入文件、切换选项时的预热只使用已运行的子进程，不在界面线程上重新启动它
+        """
+        if start:
+            process = self.get_conversion_process()
+        else:
+            process = self.conversion_process
+            if process is not None and not process.is_available():
+                process = None
+        if process is not None:
+            process.prewarm(convert_to_china)
+        else:
+            threading.Thread(target=prewarm, args=(convert_to_china,),
+                             name='Prewarm', daemon=True).start()
+
+    def stop_watch_folder(self):
+        """停止监视文件夹"""
+        if self.watch_service:
+            self.watch_service.stop(wait=False)
+            self.watch_service = None
+
+    def on_watch_converted(self, path, success, message):
+        """监视文件夹中的文件转换完成"""
+        if success:
+            self.tray_icon.showMessage('自动转换完成', message, QSystemTrayIcon.Information, 2000)
+        else:
+            self.tray_icon.showMessage('自动转换失败', message, QSystemTrayIcon.Warning, 3000)
+
     def show_main_window(self):
         """显示主窗口"""
         self.show()
@@ -2144,6 +2191,9 @@ class SrtToAssConverter(QMainWindow):
 
     def quit_application(self):
         """退出应用程序"""
+        self.stop_watch_folder()
+        if self.conversion_process is not None:
+            self.conversion_process.shutdown()
         self.tray_icon.hide()
         QApplication.instance().quit()
 
@@ -2170,6 +2220,23 @@ class SrtToAssConverter(QMainWindow):
             print(f'关闭事件处理错误: {str(e)}')
             event.accept()
 
+    def current_settings(self, subtitle_color=None, outline_color=None):
+        """当前界面中的配置，格式与配置文件一致"""
+        return {
+            'subtitle_configs': self.subtitle_configs,
+            'subtitle_color': subtitle_color or self.subtitle_color,
+            'outline_color': outline_color or self.outline_color,
+            'output_directory': self.main_interface.output_directory,
+            'font_family': self.font_family,
+            'font_size': self.font_size,
+            'style_profiles': self.style_profiles,
+            'style_profile': self.style_profile,
+            'output_collision': self.output_collision,
+            'output_layout': self.output_layout,
+            'output_variants': self.output_variants,
+            'output_formats': self.output_formats,
+        }
+
     def load_subtitle_configs(self):
         """加载字幕配置"""
         if os.path.exists(CONFIG_FILE):
@@ -2211,6 +2278,12 @@ class SrtToAssConverter(QMainWindow):
                     self.main_interface.output_directory = settings.get('output_directory', '')
                     self.font_family = settings.get('font_family', '方正粗圆_GBK')
                     self.font_size = settings.get('font_size', 70)
+                    self.style_profiles = settings.get('style_profiles', {})
+                    self.style_profile = settings.get('style_profile', '')
+                    self.output_collision = settings.get('output_collision', OUTPUT_COLLISION_SUFFIX)
+                    self.output_layout = settings.get('output_layout', OUTPUT_LAYOUT_FLAT)
+                    self.output_variants = settings.get('output_variants', [])
+                    self.output_formats = settings.get('output_formats', ['ass'])
             else:
                 self.font_family = '方正粗圆_GBK'
                 self.font_size = 70
@@ -2226,7 +2299,13 @@ class SrtToAssConverter(QMainWindow):
             settings = {
                 'output_directory': self.main_interface.output_directory,
                 'font_family': self.font_family,
-                'font_size': self.font_size
+                'font_size': self.font_size,
+                'style_profiles': self.style_profiles,
+                'style_profile': self.style_profile,
+                'output_collision': self.output_collision,
+                'output_layout': self.output_layout,
+                'output_variants': self.output_variants,
+                'output_formats': self.output_formats
             }
             with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, indent=4, ensure_ascii=False)
@@ -2238,6 +2317,7 @@ def main():
     try:
         # 创建应用程序
         app = QApplication(sys.argv)
+        startup_profile.mark('创建 QApplication')
 
         # 设置应用程序属性
         app.setApplicationName("SRT转ASS字幕转换器")
@@ -2274,7 +2354,13 @@ def main():
 
         # 创建并显示主窗口
         window = SrtToAssConverter()
+        startup_profile.mark('创建主窗口')
         window.show()
+        startup_profile.mark('主窗口显示')
+
+        # 首帧绘制后再在后台加载转换模块
+        QTimer.singleShot(0, lambda: startup_profile.finish_startup(app))
+        QTimer.singleShot(0, window.preload_in_background)
 
         # 启动应用程序
         sys.exit(app.exec_())
@@ -2285,4 +2371,6 @@ def main():
         traceback.print_exc()
 
 if __name__ == '__main__':
+    # 打包后的程序启动分片转换的子进程时，在这里直接进入子进程逻辑
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视文件夹模式
+持续监视暂存目录，新字幕写入完成后自动转换到输出目录
+Linux 上使用 inotify，其他平台退回到定时扫描
+可以从托盘菜单启动，也可以无界面运行:
+    python watch_folder.py 目录1 [目录2 ...] -o 输出目录
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from conversion_process import ConversionProcessUnavailable
+from subtitle_engine import (OUTPUT_COLLISION_SCHEMES, OUTPUT_COLLISION_SUFFIX, FileReport, build_convert_options,
+                             convert_file, is_subtitle_file, load_app_settings, path_key, plan_outputs)
+
+# inotify 常量，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class Inotify:
+    """通过 ctypes 调用 libc 的最小 inotify 封装"""
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._get_errno = ctypes.get_errno
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self._get_errno(), 'inotify_init1 失败')
+        self.directories = {}
+
+    def add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(self._get_errno(), f'无法监视目录: {directory}')
+        self.directories[wd] = directory
+
+    def read(self, timeout):
+        """等待事件，返回有变化的文件路径"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, _mask, _cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name and wd in self.directories:
+                paths.append(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """监视目录中的新字幕文件，文件大小和修改时间稳定一段时间后才认为写入完成"""
+
+    def __init__(self, directories, on_file_ready, debounce=2.0, poll_interval=1.0,
+                 process_existing=False, use_inotify=True):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.on_file_ready = on_file_ready
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.process_existing = process_existing
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.pending = {}  # 路径 -> (签名, 最后变化时间)
+        self.seen = {}     # 路径 -> 已处理时的签名
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._inotify = None
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _scan(self):
+        """扫描所有目录，返回当前字幕文件及签名"""
+        found = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file() and is_subtitle_file(entry.name):
+                            stat = entry.stat()
+                            found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError as e:
+                print(f"扫描目录失败 {directory}: {e}")
+        return found
+
+    def _touch(self, path, signature=None):
+        """记录有变化的文件，重新开始防抖计时"""
+        if not is_subtitle_file(path):
+            return
+        signature = signature or self._signature(path)
+        if signature is None or self.seen.get(path) == signature:
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[0] != signature:
+            self.pending[path] = (signature, time.monotonic())
+
+    def _check_pending(self):
+        """把已稳定的文件交给回调"""
+        now = time.monotonic()
+        for path, (signature, changed_at) in list(self.pending.items()):
+            current = self._signature(path)
+            if current is None:
+                del self.pending[path]  # 文件已被移走
+            elif current != signature:
+                self.pending[path] = (current, now)
+            elif now - changed_at >= self.debounce:
+                del self.pending[path]
+                self.seen[path] = signature
+                try:
+                    self.on_file_ready(path)
+                except Exception as e:
+                    print(f"处理文件失败 {path}: {e}")
+
+    def start(self):
+        """启动监视线程"""
+        if self.use_inotify:
+            try:
+                self._inotify = Inotify()
+                for directory in self.directories:
+                    self._inotify.add_watch(directory)
+            except (OSError, AttributeError) as e:
+                print(f"inotify 不可用，改为定时扫描: {e}")
+                if self._inotify:
+                    self._inotify.close()
+                self._inotify = None
+
+        existing = self._scan()
+        if self.process_existing:
+            for path, signature in existing.items():
+                self._touch(path, signature)
+        else:
+            self.seen.update(existing)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='FolderWatcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self._inotify:
+                # 有待定文件时缩短等待，及时完成防抖检查
+                timeout = min(self.poll_interval, self.debounce / 2) if self.pending else self.poll_interval
+                for path in self._inotify.read(timeout):
+                    self._touch(path)
+            else:
+                for path, signature in self._scan().items():
+                    self._touch(path, signature)
+                self._stop_event.wait(self.poll_interval)
+            self._check_pending()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+
+class WatchService:
+    """把监视到的字幕交给转换引擎，并发数量受 max_workers 限制"""
+
+    def __init__(self, directories, output_directory, options, max_workers=2,
+                 debounce=2.0, poll_interval=1.0, process_existing=False,
+                 use_inotify=True, on_result=None, collision=OUTPUT_COLLISION_SUFFIX, process=None):
+        self.output_directory = output_directory
+        self.options = options
+        self.collision = collision  # 不同源文件输出重名时的处理方式，与批次转换相同
+        self.process = process  # 界面的转换子进程，为 None 或不可用时在本进程转换
+        self.max_workers = max(1, max_workers)
+        self.on_result = on_result  # 回调 (源文件, 是否成功, 消息)，在工作线程中调用
+        self.produced = set()  # 本服务写出的文件，避免被当作新字幕再次转换
+        self.assigned = {}     # 源文件 -> 输出文件，同一源文件再次写入时覆盖自己上次的输出
+        self._lock = threading.Lock()
+        self._executor = None
+        self.watcher = FolderWatcher(directories, self._on_file_ready, debounce,
+                                     poll_interval, process_existing, use_inotify)
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='WatchConvert')
+        self.watcher.start()
+        mode = 'inotify' if self.watcher._inotify else '定时扫描'
+        print(f"开始监视 ({mode}): {', '.join(self.watcher.directories)}")
+
+    def stop(self, wait=True):
+        self.watcher.stop()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        if self.process is not None:
+            self.process.forget_options(self.options)
+
+    def _on_file_ready(self, path):
+        key = path_key(path)
+        with self._lock:
+            if key in self.produced:
+                return
+            ass_file = self.assigned.get(key)
+            if ass_file is None:
+                # 与批次转换一样规划输出：已写出的文件（含其他格式和输出变体）视为已占用，重名时按 collision 处理
+                plan = plan_outputs([path], self.output_directory, self.collision,
+                                    reserved=self.produced, written_paths=self.options.written_paths)
+                for _, reason in plan.skipped:
+                    print(f"跳过 {path}: {reason}")
+                if not plan.jobs:
+                    return
+                ass_file = plan.jobs[0][1]
+            output_keys = {path_key(output) for output in self.options.written_paths(ass_file)}
+            if key in output_keys:
+                print(f"跳过 {path}: 输出会覆盖源文件本身，请设置其他输出目录")
+                return
+            self.assigned[key] = ass_file
+            self.produced.update(output_keys)
+        self._executor.submit(self._convert, path, ass_file)
+
+    def _convert_file(self, path, ass_file):
+        """优先交给转换子进程，本线程只等待结果；子进程不可用时在本线程转换"""
+        if self.process is not None:
+            try:
+                return self.process.convert(path, ass_file, self.options, FileReport(path, ass_file))
+            except ConversionProcessUnavailable:
+                pass
+        return convert_file(path, ass_file, self.options)
+
+    def _convert(self, path, ass_file):
+        try:
+            message = self._convert_file(path, ass_file)
+            success = True
+        except Exception as e:
+            message = f"{os.path.basename(path)}: {e}"
+            success = False
+        if self.on_result:
+            self.on_result(path, success, message)
+        else:
+            print(message if success else f"转换失败: {message}")
+
+
+def main(argv=None):
+    """无界面运行监视模式"""
+    parser = argparse.ArgumentParser(description='监视文件夹并自动把字幕转换为ASS')
+    parser.add_argument('directories', nargs='+', help='要监视的目录')
+    parser.add_argument('-o', '--output', help='输出目录，默认使用 settings.json 中的 output_directory')
+    parser.add_argument('--insert', action='append', default=[], metavar='NAME',
+                        help='插入的字幕配置名称，可重复')
+    parser.add_argument('--china', action='store_true', help='繁体中国化')
+    parser.add_argument('--opencc-first', action='store_true', help='优先使用本地OpenCC而不是在线API')
+    parser.add_argument('--delete-original', action='store_true', help='转换后删除原文件')
+    parser.add_argument('--workers', type=int, default=2, help='同时转换的文件数')
+    parser.add_argument('--collision', choices=sorted(OUTPUT_COLLISION_SCHEMES),
+                        help='输出重名时的处理方式，默认使用 settings.json 中的 output_collision')
+    parser.add_argument('--debounce', type=float, default=2.0, help='文件稳定多少秒后开始转换')
+    parser.add_argument('--existing', action='store_true', help='同时转换启动时已存在的文件')
+    parser.add_argument('--polling', action='store_true', help='不使用 inotify，强制定时扫描')
+    args = parser.parse_args(argv)
+
+    settings = load_app_settings()
+    output_directory = args.output or settings['output_directory']
+    try:
+        options = build_convert_options(settings, args.insert, args.delete_original,
+                                        args.china, not args.opencc_first)
+    except ValueError as e:
+        print(e)
+        return 1
+    if output_directory:
+        os.makedirs(output_directory, exist_ok=True)
+
+    service = WatchService(args.directories, output_directory, options,
+                           max_workers=args.workers, debounce=args.debounce,
+                           process_existing=args.existing, use_inotify=not args.polling,
+                           collision=args.collision or settings['output_collision'])
+    service.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("正在停止监视...")
+    finally:
+        service.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())